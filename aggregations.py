@@ -0,0 +1,419 @@
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+
+from custom_transformers import _debt_income_ratio_finish, _join_aggregate, _prev_annuity_income_ratio_finish
+
+# Tables which are not keyed by SK_ID_CURR directly: table name -> (key column, table which maps key column to SK_ID_CURR).
+LINKED_TABLES = {"bureau_balance": ("SK_ID_BUREAU", "bureau")}
+
+REDUCTIONS = ("sum", "mean", "max", "min", "count", "dummies")
+
+
+@dataclass(frozen=True)
+class Aggregation:
+    """Declarative description of one aggregated feature of additional dataframe.
+
+    Keyword arguments:
+    name -- name of the output column. For "dummies" reduction it is a prefix of output columns.
+    table -- name of the source table, for example "bureau" or "previous_application".
+    column -- name of the aggregated column or function which takes in source table and returns values to aggregate.
+    reduction -- one of "sum", "mean", "max", "min", "count" or "dummies" (count of every distinct value).
+    where -- function which takes in source table and returns boolean mask of rows to aggregate.
+    """
+
+    name: str
+    table: str
+    column: Union[str, Callable]
+    reduction: str
+    where: Optional[Callable] = None
+
+
+def _last_months(months: int) -> Callable:
+    return lambda df: df["MONTHS_BALANCE"] > -months
+
+
+def _active_last_year(df: pd.DataFrame) -> pd.Series:
+    return (df["MONTHS_BALANCE"] > -12) & (df["NAME_CONTRACT_STATUS"] == "Active")
+
+
+def _active_bureau_debt(df: pd.DataFrame) -> pd.Series:
+    return (df["AMT_CREDIT_SUM_DEBT"] > 0) & (df["CREDIT_ACTIVE"] == "Active") & (df["DAYS_CREDIT_ENDDATE"] > 0)
+
+
+def _credit_card_dpd() -> list:
+    return [Aggregation("FLAG_DPD", "credit_card_balance", lambda df: np.where(df["SK_DPD"] > 0, 1, 0), "sum", _active_last_year)]
+
+
+def _pos_cash_dpd() -> list:
+    return [Aggregation("SK_DPD", "pos_cash_balance", "SK_DPD", "sum", _active_last_year)]
+
+
+def _credit_card_drawings() -> list:
+    # Same columns as iloc[:, -4:] in credit_card_drawings function.
+    drawings = ["AMT_DRAWINGS_CURRENT", "AMT_DRAWINGS_OTHER_CURRENT", "AMT_DRAWINGS_POS_CURRENT", "MONTHS_BALANCE"]
+
+    return [Aggregation("ALL_DRAWINGS", "credit_card_balance", lambda df: df[drawings].fillna(0).sum(axis=1), "sum", _last_months(7))]
+
+
+def _bureau_credit_type_counter(scarce_values: list) -> list:
+    credit_type = lambda df: np.where(df["CREDIT_TYPE"].isin(scarce_values), "Other", df["CREDIT_TYPE"])
+
+    return [Aggregation("BUREAU_CREDIT", "bureau", credit_type, "dummies")]
+
+
+def _prev_credit_type_counter() -> list:
+    return [Aggregation("PREV_APP", "previous_application", "NAME_CONTRACT_TYPE", "dummies")]
+
+
+def _prev_flag_insurance() -> list:
+    return [Aggregation("NFLAG_INSURED_ON_APPROVAL", "previous_application", "NFLAG_INSURED_ON_APPROVAL", "max")]
+
+
+def _prev_annuity_income_ratio() -> list:
+    return [Aggregation("PREV_ANNUITY", "previous_application", "AMT_ANNUITY", "mean")]
+
+
+def _prev_dpd_flag(dpd_notation: list) -> list:
+    return [Aggregation("DPD_STATUS", "bureau_balance", lambda df: np.where(df["STATUS"].isin(dpd_notation), 1, 0), "sum")]
+
+
+def _down_payment_rate() -> list:
+    return [Aggregation("RATE_DOWN_PAYMENT", "previous_application", "RATE_DOWN_PAYMENT", "mean")]
+
+
+def _installments_version() -> list:
+    return [Aggregation("NUM_INSTALMENT_VERSION", "installments_payments", "NUM_INSTALMENT_VERSION", "mean",
+                        lambda df: df["NUM_INSTALMENT_VERSION"] > 1)]
+
+
+def _debt_income_ratio() -> list:
+    return [Aggregation("AMT_CREDIT_SUM_DEBT", "bureau", "AMT_CREDIT_SUM_DEBT", "sum", _active_bureau_debt),
+            Aggregation("DAYS_CREDIT_ENDDATE", "bureau", "DAYS_CREDIT_ENDDATE", "sum", _active_bureau_debt)]
+
+
+def _debt_income_ratio_from_sums(result: pd.DataFrame) -> pd.DataFrame:
+    result["CREDIT_DEBT_ANNUITY"] = np.where(result["DAYS_CREDIT_ENDDATE"] > 0,
+                                             result["AMT_CREDIT_SUM_DEBT"] / (result["DAYS_CREDIT_ENDDATE"] / 30), 0)
+
+    return _debt_income_ratio_finish(result)
+
+
+# Side-table features of custom_transformers.py: feature name -> function which returns list of aggregations.
+FEATURES = {
+    "credit_card_dpd": _credit_card_dpd,
+    "pos_cash_dpd": _pos_cash_dpd,
+    "credit_card_drawings": _credit_card_drawings,
+    "bureau_credit_type_counter": _bureau_credit_type_counter,
+    "prev_credit_type_counter": _prev_credit_type_counter,
+    "prev_flag_insurance": _prev_flag_insurance,
+    "prev_annuity_income_ratio": _prev_annuity_income_ratio,
+    "prev_dpd_flag": _prev_dpd_flag,
+    "down_payment_rate": _down_payment_rate,
+    "installments_version": _installments_version,
+    "debt_income_ratio": _debt_income_ratio,
+}
+
+# Columns which are calculated from joined aggregations: feature name -> function applied to joined dataframe.
+FINISHERS = {
+    "prev_annuity_income_ratio": _prev_annuity_income_ratio_finish,
+    "debt_income_ratio": _debt_income_ratio_from_sums,
+}
+
+
+def feature_aggregations(features: list, feature_params: dict = None) -> list:
+    """Takes in list of feature names from FEATURES and returns list of their aggregations.
+
+    Keyword arguments:
+    features -- list of feature names, for example ["prev_flag_insurance", "bureau_credit_type_counter"].
+    feature_params -- dictionary with keyword arguments of features, for example {"prev_dpd_flag": {"dpd_notation": ["1", "2"]}}.
+    """
+
+    feature_params = feature_params or {}
+
+    return [aggregation for feature in features for aggregation in FEATURES[feature](**feature_params.get(feature, {}))]
+
+
+def _client_ids(tables: dict, table_name: str) -> pd.Series:
+    """Returns SK_ID_CURR for every row of the table, mapped through linked table if needed."""
+
+    table = tables[table_name]
+
+    if table_name in LINKED_TABLES:
+        key, link_table = LINKED_TABLES[table_name]
+        mapping = tables[link_table].set_index(key)["SK_ID_CURR"]
+        return table[key].map(mapping).rename("SK_ID_CURR")
+
+    return table["SK_ID_CURR"]
+
+
+def _aggregate_table(tables: dict, table_name: str, aggregations: list) -> pd.DataFrame:
+    """Calculates all aggregations of one table in a single groupby."""
+
+    table = tables[table_name]
+    values = {}
+    reductions = {}
+
+    for aggregation in aggregations:
+        column = aggregation.column(table) if callable(aggregation.column) else table[aggregation.column]
+        column = pd.Series(column, index=table.index)
+
+        if aggregation.where is not None:
+            column = column.where(aggregation.where(table))
+
+        if aggregation.reduction == "dummies":
+            dummies = pd.get_dummies(column, prefix=aggregation.name)
+            values.update(dummies.items())
+            reductions.update({name: "sum" for name in dummies.columns})
+        else:
+            values[aggregation.name] = column
+            reductions[aggregation.name] = aggregation.reduction
+
+    grouped = pd.DataFrame(values, index=table.index).groupby(_client_ids(tables, table_name)).agg(reductions)
+    grouped.index = grouped.index.astype(np.int64)
+
+    return grouped
+
+
+def aggregate(tables: dict, aggregations: list) -> pd.DataFrame:
+    """Takes in dictionary of additional dataframes and list of aggregations and returns dataframe
+    with one row per SK_ID_CURR and one column per aggregated feature. Every source table is grouped only once.
+
+    Keyword arguments:
+    tables -- dictionary of additional dataframes, for example {"bureau": bureau, "previous_application": previous_application}.
+    aggregations -- list of Aggregation objects.
+    """
+
+    by_table = {}
+
+    for aggregation in aggregations:
+        if aggregation.reduction not in REDUCTIONS:
+            raise ValueError(f"Unknown reduction {aggregation.reduction!r} of {aggregation.name}.")
+
+        table_aggregations = by_table.setdefault(aggregation.table, {})
+
+        if table_aggregations.get(aggregation.name, aggregation) != aggregation:
+            raise ValueError(f"Different aggregations of {aggregation.table} have the same name {aggregation.name}.")
+
+        table_aggregations[aggregation.name] = aggregation
+
+    aggregated = [_aggregate_table(tables, table_name, list(table_aggregations.values()))
+                  for table_name, table_aggregations in by_table.items()]
+
+    result = pd.concat(aggregated, axis=1)
+    result.index.name = "SK_ID_CURR"
+
+    return result
+
+
+class FeatureAggregator(BaseEstimator, TransformerMixin):
+    """Transformer which adds several side-table features of custom_transformers.py at once. All features
+    from the same table are calculated in one groupby in fit and joined to the pipeline dataframe with a single merge.
+
+    Keyword arguments:
+    tables -- dictionary of additional dataframes, for example {"bureau": bureau, "previous_application": previous_application}.
+    features -- list of feature names from FEATURES.
+    feature_params -- dictionary with keyword arguments of features, for example {"bureau_credit_type_counter": {"scarce_values": scarce_values}}.
+    inplace -- if True, new columns are attached to dataframe from pipeline itself.
+    """
+
+    def __init__(self, tables: dict, features: list, feature_params: dict = None, inplace: bool = False):
+        self.tables = tables
+        self.features = features
+        self.feature_params = feature_params
+        self.inplace = inplace
+
+    def fit(self, X: pd.DataFrame, y: pd.Series = None):
+        self.aggregate_ = aggregate(self.tables, feature_aggregations(self.features, self.feature_params))
+
+        return self
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        check_is_fitted(self, "aggregate_")
+
+        result = _join_aggregate(X, self.aggregate_, self.inplace)
+
+        for feature in self.features:
+            if feature in FINISHERS:
+                result = FINISHERS[feature](result)
+
+        return result
+
+
+DEFAULT_WINDOWS = (3, 6, 12, 24)
+WINDOW_REDUCTIONS = ("sum", "count", "max", "flag")
+
+# Months before application of every row of monthly tables: table name -> function which takes in the table and returns them.
+# Window of N months takes rows with value above -N, the same as MONTHS_BALANCE > -12 in credit_card_dpd.
+WINDOW_TIMES = {
+    "credit_card_balance": lambda df: df["MONTHS_BALANCE"],
+    "pos_cash_balance": lambda df: df["MONTHS_BALANCE"],
+    "bureau_balance": lambda df: df["MONTHS_BALANCE"],
+    "installments_payments": lambda df: df["DAYS_INSTALMENT"] / 30,
+}
+
+
+@dataclass(frozen=True)
+class WindowedAggregation:
+    """Declarative description of aggregated feature of monthly table over several time windows.
+
+    Keyword arguments:
+    name -- prefix of output columns, column of N months window is named "{name}_{N}M".
+    table -- name of the source table, one of WINDOW_TIMES.
+    column -- name of the aggregated column or function which takes in source table and returns values to aggregate.
+    reduction -- one of "sum", "count" (number of non-missing values), "max" or "flag" (1 if any value is above 0).
+    windows -- lengths of windows in months.
+    where -- function which takes in source table and returns boolean mask of rows to aggregate.
+    """
+
+    name: str
+    table: str
+    column: Union[str, Callable]
+    reduction: str
+    windows: tuple = DEFAULT_WINDOWS
+    where: Optional[Callable] = None
+
+
+def _active(df: pd.DataFrame) -> pd.Series:
+    return df["NAME_CONTRACT_STATUS"] == "Active"
+
+
+def default_window_aggregations(windows: tuple = DEFAULT_WINDOWS, dpd_notation: list = ("1", "2", "3", "4", "5")) -> list:
+    """Returns windowed versions of DPD and drawings features of custom_transformers.py and late payments of installments.
+
+    Keyword arguments:
+    windows -- lengths of windows in months.
+    dpd_notation -- STATUS values of bureau_balance which mean DPD, as in prev_dpd_flag.
+    """
+
+    drawings = ["AMT_DRAWINGS_CURRENT", "AMT_DRAWINGS_OTHER_CURRENT", "AMT_DRAWINGS_POS_CURRENT"]
+
+    return [
+        WindowedAggregation("FLAG_DPD", "credit_card_balance", lambda df: np.where(df["SK_DPD"] > 0, 1, 0), "sum", windows, _active),
+        WindowedAggregation("ALL_DRAWINGS", "credit_card_balance", lambda df: df[drawings].fillna(0).sum(axis=1), "sum", windows),
+        WindowedAggregation("SK_DPD", "pos_cash_balance", "SK_DPD", "sum", windows, _active),
+        WindowedAggregation("MAX_DPD", "pos_cash_balance", "SK_DPD", "max", windows),
+        WindowedAggregation("DPD_STATUS", "bureau_balance", lambda df: np.where(df["STATUS"].astype(str).isin(dpd_notation), 1, 0), "sum", windows),
+        WindowedAggregation("LATE_PAYMENT", "installments_payments", lambda df: df["DAYS_ENTRY_PAYMENT"] - df["DAYS_INSTALMENT"], "flag", windows),
+    ]
+
+
+def _window_table(tables: dict, table_name: str, aggregations: list) -> pd.DataFrame:
+    """Calculates all windows of all aggregations of one table. Rows are sorted by (SK_ID_CURR, month) once, so rows
+    of a client inside a window are a contiguous segment whose start is found by binary search. Sums and counts of
+    every segment are differences of cumulative sums and maximums are segment reductions with np.fmax.reduceat.
+    """
+
+    table = tables[table_name]
+    codes, clients = pd.factorize(_client_ids(tables, table_name), sort=True)
+    times = np.asarray(WINDOW_TIMES[table_name](table), dtype=np.float64)
+
+    # Rows of bureau_balance with credits unknown to bureau or without month are not aggregated.
+    rows = np.flatnonzero((codes >= 0) & ~np.isnan(times))
+    rows = rows[np.lexsort((times[rows], codes[rows]))]
+    sorted_codes, sorted_times = codes[rows], times[rows]
+
+    offsets = np.searchsorted(sorted_codes, np.arange(len(clients) + 1))
+    ends = offsets[1:]
+
+    # (client, month) pairs as one sorted key, so starts of windows of all clients are found by one searchsorted call.
+    earliest = sorted_times.min() if len(rows) else 0.0
+    span = (sorted_times.max() - earliest + 1) if len(rows) else 1.0
+    keys = sorted_codes * span + (sorted_times - earliest)
+
+    starts = {window: np.clip(np.searchsorted(keys, np.arange(len(clients)) * span + (-window - earliest), side="right"), offsets[:-1], ends)
+              for window in {window for aggregation in aggregations for window in aggregation.windows}}
+
+    columns = {}
+
+    for aggregation in aggregations:
+        column = aggregation.column(table) if callable(aggregation.column) else table[aggregation.column]
+        values = np.asarray(column, dtype=np.float64)[rows]
+        valid = ~np.isnan(values)
+
+        if aggregation.where is not None:
+            valid &= np.asarray(aggregation.where(table), dtype=bool)[rows]
+
+        if aggregation.reduction == "max":
+            # NaN at the end makes the end of the last client a valid index of reduceat.
+            masked = np.append(np.where(valid, values, np.nan), np.nan)
+        else:
+            counted = {"sum": np.where(valid, values, 0), "count": valid, "flag": valid & (values > 0)}[aggregation.reduction]
+            cumulative = np.concatenate([[0], np.cumsum(counted)])
+
+        for window in aggregation.windows:
+            window_starts = starts[window]
+
+            if aggregation.reduction == "max":
+                maxima = np.fmax.reduceat(masked, np.column_stack([window_starts, ends]).ravel())[::2]
+                result = np.where(window_starts < ends, maxima, np.nan)
+            else:
+                result = cumulative[ends] - cumulative[window_starts]
+
+                if aggregation.reduction == "flag":
+                    result = (result > 0).astype(np.int64)
+
+            columns[f"{aggregation.name}_{window}M"] = result
+
+    return pd.DataFrame(columns, index=pd.Index(np.asarray(clients, dtype=np.int64), name="SK_ID_CURR"))
+
+
+def windowed_aggregate(tables: dict, aggregations: list) -> pd.DataFrame:
+    """Takes in dictionary of monthly tables and list of windowed aggregations and returns dataframe with one row
+    per SK_ID_CURR and one column per aggregation and window. Every table is sorted once for all its windows.
+
+    Keyword arguments:
+    tables -- dictionary of additional dataframes, for example {"credit_card_balance": credit_card_balance}.
+    bureau_balance also needs bureau, which maps SK_ID_BUREAU to SK_ID_CURR.
+    aggregations -- list of WindowedAggregation objects.
+    """
+
+    by_table = {}
+
+    for aggregation in aggregations:
+        if aggregation.reduction not in WINDOW_REDUCTIONS:
+            raise ValueError(f"Unknown windowed reduction {aggregation.reduction!r} of {aggregation.name}.")
+        if aggregation.table not in WINDOW_TIMES:
+            raise ValueError(f"Table {aggregation.table} of {aggregation.name} has no months, expected one of {tuple(WINDOW_TIMES)}.")
+
+        by_table.setdefault(aggregation.table, []).append(aggregation)
+
+    result = pd.concat([_window_table(tables, table_name, table_aggregations) for table_name, table_aggregations in by_table.items()], axis=1)
+    result.index.name = "SK_ID_CURR"
+
+    return result
+
+
+class WindowedAggregator(BaseEstimator, TransformerMixin):
+    """Transformer which adds windowed aggregations of monthly tables, for example FLAG_DPD over the last
+    3, 6, 12 and 24 months. Aggregations are calculated once in fit and joined on SK_ID_CURR in transform.
+
+    Keyword arguments:
+    tables -- dictionary of additional dataframes, for example {"credit_card_balance": credit_card_balance}.
+    aggregations -- list of WindowedAggregation objects, default_window_aggregations() of the given tables if None.
+    inplace -- if True, new columns are attached to dataframe from pipeline itself.
+    """
+
+    def __init__(self, tables: dict, aggregations: list = None, inplace: bool = False):
+        self.tables = tables
+        self.aggregations = aggregations
+        self.inplace = inplace
+
+    def fit(self, X: pd.DataFrame, y: pd.Series = None):
+        if self.aggregations is not None:
+            aggregations = self.aggregations
+        else:
+            aggregations = [aggregation for aggregation in default_window_aggregations() if aggregation.table in self.tables]
+
+        self.aggregate_ = windowed_aggregate(self.tables, aggregations)
+
+        return self
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        check_is_fitted(self, "aggregate_")
+
+        return _join_aggregate(X, self.aggregate_, self.inplace)
\ No newline at end of file
@@ -0,0 +1,253 @@
+import gzip
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sklearn.preprocessing import FunctionTransformer
+
+from custom_transformers import _attach_columns, _drop_columns
+from feature_graph import FEATURE_COLUMNS, _step_outputs, feature_step
+from feature_store import IGNORED_ARGUMENTS, _frame_fingerprint
+from online_scoring import OnlineScorer
+from streaming import is_path, read_chunks
+
+BLEND_METHODS = ("mean", "rank")
+OUTPUT_FORMATS = ("csv", "csv.gz", "parquet")
+
+
+@dataclass(frozen=True)
+class Blend:
+    """Blend of predictions of several models, for example averaged_predictions of the notebook.
+
+    Keyword arguments:
+    name -- name prefix of the output file, e.g. "averaged" for "averaged_predictions.csv.gz".
+    models -- names of blended pipelines.
+    method -- "mean" (weighted mean of probabilities, written chunk by chunk) or "rank" (weighted mean
+    of percentile ranks, written by the second pass over saved predictions of the models).
+    weights -- weights of the models, equal if None.
+    """
+
+    name: str
+    models: tuple
+    method: str = "mean"
+    weights: Optional[tuple] = None
+
+
+class _PredictionWriter:
+    """Appends chunks of predictions to CSV, gzip-compressed CSV or Parquet file. The file is written
+    under temporary name and renamed when it is closed, so interrupted run never leaves a partial submission.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0
+        self._file = None
+        self._parquet = None
+
+    def write(self, ids: np.ndarray, predictions: np.ndarray):
+        chunk = pd.DataFrame({"SK_ID_CURR": ids, "TARGET": np.asarray(predictions, dtype=np.float64)})
+
+        if self.path.endswith(".parquet"):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path + ".tmp", table.schema)
+            self._parquet.write_table(table)
+        else:
+            if self._file is None:
+                opener = gzip.open if self.path.endswith(".gz") else open
+                self._file = opener(self.path + ".tmp", "wt", newline="")
+            chunk.to_csv(self._file, header=self.rows == 0, index=False)
+
+        self.rows += len(chunk)
+
+    def close(self, complete: bool = True):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._file is not None:
+            self._file.close()
+
+        if not self.rows:
+            return
+
+        if complete:
+            os.replace(self.path + ".tmp", self.path)
+        else:
+            os.remove(self.path + ".tmp")
+
+
+def _close_writers(writers, complete: bool):
+    """Closes every writer even if some of them fail and raises the first error afterwards."""
+
+    errors = []
+
+    for writer in writers:
+        try:
+            writer.close(complete)
+        except Exception as error:
+            errors.append(error)
+
+    if errors:
+        raise errors[0]
+
+
+def _read_predictions(path: str, columns: list) -> pd.DataFrame:
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+
+    return pd.read_csv(path, usecols=columns)
+
+
+class _SharedFeatureScorer(OnlineScorer):
+    """OnlineScorer which takes features of side tables from per-chunk dictionary shared by all pipelines,
+    so feature which several pipelines use (e.g. credit_card_dpd) is computed once per chunk.
+    """
+
+    def __init__(self, pipeline, indexes: dict, shared: dict):
+        super().__init__(pipeline, indexes=indexes)
+        self.shared = shared
+
+    def _side_table_feature(self, transformer: FunctionTransformer, X: pd.DataFrame, client_ids: np.ndarray) -> pd.DataFrame:
+        if transformer.func.__name__ not in FEATURE_COLUMNS:
+            return super()._side_table_feature(transformer, X, client_ids)
+
+        kw_args = {name: value for name, value in (transformer.kw_args or {}).items() if name not in IGNORED_ARGUMENTS}
+        step = feature_step(transformer.func, **kw_args)
+        step_input = X[list(step.inputs)]
+        # Side tables are the same objects in every pipeline, other arguments are compared by value.
+        key = (transformer.func.__name__,
+               tuple(sorted((name, id(value) if isinstance(value, pd.DataFrame) else repr(value)) for name, value in kw_args.items())),
+               _frame_fingerprint(step_input))
+
+        if key not in self.shared:
+            result = transformer.func(step_input, **self._applicant_kw_args(transformer, client_ids))
+            self.shared[key] = (_step_outputs(step, step_input, result), list(step.drops))
+
+        new_columns, drops = self.shared[key]
+
+        return _drop_columns(_attach_columns(X, new_columns), drops, inplace=True)
+
+
+class BatchScorer:
+    """Scores test set with several fitted pipelines in chunks of fixed size and writes predictions of every
+    pipeline and their blends as soon as a chunk is scored. Side tables are indexed once for all pipelines
+    (see online_scoring.py), features of side tables which pipelines share are computed once per chunk and only
+    the current chunk is held in memory, so peak memory does not grow with size of the test set.
+
+    Keyword arguments:
+    pipelines -- dictionary with names and fitted pipelines, for example {"lgbm": lgbm_pipe, "xgboost": xgboost_pipe}.
+    blends -- list of Blend objects.
+    chunksize -- number of applications scored at once.
+    output_format -- "csv", "csv.gz" or "parquet".
+    prepare -- function which takes in chunk of application_test and returns X_test rows for the pipelines, e.g.
+    conversion of DAYS_BIRTH to AGE. It should fill missing values with statistics of the training set, not of the chunk.
+    """
+
+    def __init__(self, pipelines: dict, blends: list = (), chunksize: int = 50_000, output_format: str = "csv.gz",
+                 prepare: Callable = None):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format {output_format!r}, expected one of {OUTPUT_FORMATS}.")
+
+        for blend in blends:
+            if blend.method not in BLEND_METHODS:
+                raise ValueError(f"Unknown blend method {blend.method!r}, expected one of {BLEND_METHODS}.")
+
+            missing = set(blend.models) - set(pipelines)
+            if missing:
+                raise ValueError(f"Blend {blend.name} uses unknown models {sorted(missing)}.")
+
+        self.pipelines = pipelines
+        self.blends = list(blends)
+        self.chunksize = chunksize
+        self.output_format = output_format
+        self.prepare = prepare
+
+        self._shared = {}
+        indexes = {}
+        self._scorers = {name: _SharedFeatureScorer(pipeline, indexes, self._shared) for name, pipeline in pipelines.items()}
+
+    def _path(self, output_dir: str, name: str) -> str:
+        return os.path.join(output_dir, f"{name}_predictions.{self.output_format}")
+
+    def score(self, source, output_dir: str = "submissions", dtype: dict = None) -> pd.DataFrame:
+        """Takes in application_test as dataframe or path to CSV file and returns table with output file,
+        number of rows and time of every pipeline and blend. Blends by rank are written after all chunks are scored.
+
+        Keyword arguments:
+        source -- application_test dataframe or path to its CSV file, which is read chunk by chunk.
+        output_dir -- directory of output files.
+        dtype -- dtypes of CSV columns, see streaming.read_chunks.
+        """
+
+        os.makedirs(output_dir, exist_ok=True)
+
+        mean_blends = [blend for blend in self.blends if blend.method == "mean"]
+        writers = {name: _PredictionWriter(self._path(output_dir, name)) for name in [*self.pipelines, *(blend.name for blend in mean_blends)]}
+        seconds = dict.fromkeys(writers, 0.0)
+
+        columns = None if is_path(source) else list(source.columns)
+        complete = False
+
+        try:
+            for chunk in read_chunks(source, columns, self.chunksize, dtype):
+                X = self.prepare(chunk) if self.prepare else chunk
+                ids = X["SK_ID_CURR"].to_numpy()
+                predictions = {}
+                self._shared.clear()
+
+                for name, scorer in self._scorers.items():
+                    start = time.perf_counter()
+                    predictions[name] = scorer.predict_proba(X)
+                    writers[name].write(ids, predictions[name])
+                    seconds[name] += time.perf_counter() - start
+
+                for blend in mean_blends:
+                    start = time.perf_counter()
+                    stacked = np.column_stack([predictions[model] for model in blend.models])
+                    writers[blend.name].write(ids, np.average(stacked, axis=1, weights=blend.weights))
+                    seconds[blend.name] += time.perf_counter() - start
+
+            complete = True
+        finally:
+            self._shared.clear()
+            _close_writers(writers.values(), complete)
+
+        summary = [{"Output": writer.path, "Rows": writer.rows, "Time, s": seconds[name]} for name, writer in writers.items()]
+
+        for blend in self.blends:
+            if blend.method == "rank":
+                start = time.perf_counter()
+                writer = self._rank_blend(blend, output_dir)
+                summary.append({"Output": writer.path, "Rows": writer.rows, "Time, s": time.perf_counter() - start})
+
+        return pd.DataFrame(summary)
+
+    def _rank_blend(self, blend: Blend, output_dir: str) -> _PredictionWriter:
+        """Writes weighted mean of percentile ranks of saved predictions. Ranks are global, so predictions are read
+        back one model at a time and only one float column per model is held in memory.
+        """
+
+        weights = blend.weights or [1] * len(blend.models)
+        ids = _read_predictions(self._path(output_dir, blend.models[0]), ["SK_ID_CURR"])["SK_ID_CURR"].to_numpy()
+        ranks = np.zeros(len(ids))
+
+        for model, weight in zip(blend.models, weights):
+            ranks += weight * _read_predictions(self._path(output_dir, model), ["TARGET"])["TARGET"].rank(pct=True).to_numpy()
+
+        ranks /= sum(weights)
+
+        writer = _PredictionWriter(self._path(output_dir, blend.name))
+        complete = False
+
+        try:
+            for start in range(0, len(ids), self.chunksize):
+                writer.write(ids[start:start + self.chunksize], ranks[start:start + self.chunksize])
+            complete = True
+        finally:
+            writer.close(complete)
+
+        return writer
\ No newline at end of file
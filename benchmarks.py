@@ -0,0 +1,212 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+import pandas as pd
+
+from custom_transformers import (blend_organization_type, credit_card_dpd, flag_insurance, pos_cash_dpd, credit_card_drawings,
+                                 pandas_binning, bureau_credit_type_counter, prev_credit_type_counter, prev_flag_insurance,
+                                 annuity_income_ratio, prev_annuity_income_ratio, enquiries, prev_dpd_flag, down_payment_rate,
+                                 installments_version, debt_income_ratio, client_social_circle, drop_id, region_rating, external_source)
+from functions import distinct_values, imbalanced_features, missing_values, optimize_dtypes
+from synthetic_data import ENQUIRIES, generate_tables
+
+SCARCE_VALUES = ["Mortgage", "Microloan", "Loan for business development", "Another type of loan", "Unknown type of loan",
+                 "Loan for working capital replenishment", "Cash loan (non-earmarked)", "Real estate loan",
+                 "Loan for the purchase of equipment", "Loan for purchase of shares (margin lending)", "Mobile operator loan", "Interbank credit"]
+DPD_NOTATION = ["1", "2", "3", "4", "5"]
+AGE_LABELS = ["27_YEARS", "27-40_YEARS", "40-50_YEARS", "50-65_YEARS_MORE", "65_YEARS_MORE"]
+
+
+def prepare_application(tables: dict) -> pd.DataFrame:
+    """Returns application_train without TARGET and with AGE instead of DAYS_BIRTH, as X in the notebook."""
+
+    X = tables["application_train"].drop(columns=["TARGET"])
+    X["AGE"] = X["DAYS_BIRTH"] / -365
+
+    return X.drop(columns="DAYS_BIRTH")
+
+
+def feature_functions(tables: dict, X: pd.DataFrame) -> dict:
+    """Returns dictionary with name and function of X for every function of custom_transformers.py,
+    with the same arguments as in the notebook.
+    """
+
+    age_bins = [X["AGE"].min(), 27, 40, 50, 65, X["AGE"].max()]
+
+    return {
+        "blend_organization_type": lambda df: blend_organization_type(df),
+        "credit_card_dpd": lambda df: credit_card_dpd(df, tables["credit_card_balance"]),
+        "pos_cash_dpd": lambda df: pos_cash_dpd(df, tables["pos_cash_balance"]),
+        "flag_insurance": lambda df: flag_insurance(df),
+        "credit_card_drawings": lambda df: credit_card_drawings(df, tables["credit_card_balance"]),
+        "pandas_binning": lambda df: pandas_binning(df, "AGE", age_bins, AGE_LABELS),
+        "bureau_credit_type_counter": lambda df: bureau_credit_type_counter(df, tables["bureau"], SCARCE_VALUES),
+        "prev_credit_type_counter": lambda df: prev_credit_type_counter(df, tables["previous_application"]),
+        "bureau_credit_type_counter_sparse": lambda df: bureau_credit_type_counter(df, tables["bureau"], SCARCE_VALUES, sparse=True),
+        "prev_credit_type_counter_sparse": lambda df: prev_credit_type_counter(df, tables["previous_application"], sparse=True),
+        "prev_flag_insurance": lambda df: prev_flag_insurance(df, tables["previous_application"]),
+        "annuity_income_ratio": lambda df: annuity_income_ratio(df),
+        "prev_annuity_income_ratio": lambda df: prev_annuity_income_ratio(df, tables["previous_application"]),
+        "enquiries": lambda df: enquiries(df, ENQUIRIES),
+        "prev_dpd_flag": lambda df: prev_dpd_flag(df, tables["bureau_balance"], tables["bureau"], DPD_NOTATION),
+        "down_payment_rate": lambda df: down_payment_rate(df, tables["previous_application"]),
+        "installments_version": lambda df: installments_version(df, tables["installments_payments"]),
+        "debt_income_ratio": lambda df: debt_income_ratio(df, tables["bureau"]),
+        "client_social_circle": lambda df: client_social_circle(df),
+        "drop_id": lambda df: drop_id(df),
+        "region_rating": lambda df: region_rating(df),
+        "external_source": lambda df: external_source(df),
+    }
+
+
+# Feature chains of the notebook pipelines, in the order of custom_preprocessor_N steps.
+CHAINS = {
+    "log_pipe": ["blend_organization_type", "credit_card_dpd", "flag_insurance", "pandas_binning", "bureau_credit_type_counter",
+                 "prev_credit_type_counter", "prev_flag_insurance", "annuity_income_ratio", "prev_annuity_income_ratio",
+                 "installments_version", "drop_id"],
+    "lgbm_pipe": ["credit_card_dpd", "bureau_credit_type_counter", "prev_flag_insurance", "prev_annuity_income_ratio",
+                  "installments_version", "region_rating", "drop_id"],
+}
+
+
+def _chain(functions: dict, names: list) -> Callable:
+    def run(df: pd.DataFrame) -> pd.DataFrame:
+        for name in names:
+            df = functions[name](df)
+        return df
+
+    return run
+
+
+def benchmark_cases(tables: dict) -> dict:
+    """Returns dictionary with name and function without arguments for every benchmark: every function of
+    custom_transformers.py, functions of functions.py and feature chains of log_pipe and lgbm_pipe.
+    """
+
+    X = prepare_application(tables)
+    functions = feature_functions(tables, X)
+
+    cases = {f"custom_transformers.{name}": (lambda function=function: function(X)) for name, function in functions.items()}
+    cases.update({f"chain.{name}": (lambda chain=_chain(functions, names): chain(X)) for name, names in CHAINS.items()})
+    cases.update({
+        "functions.missing_values": lambda: missing_values(X),
+        "functions.imbalanced_features": lambda: imbalanced_features(X),
+        "functions.distinct_values": lambda: distinct_values(X, "EXT_SOURCE_3", 0.5, random_state=0),
+        "functions.optimize_dtypes": lambda: optimize_dtypes(X),
+    })
+
+    return cases
+
+
+def measure(function: Callable, repeat: int = 3) -> tuple:
+    """Returns the best wall time in seconds of repeat calls and peak traced memory in MB of one more call.
+    Memory is measured separately because tracing allocations slows the code down.
+    """
+
+    seconds = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return seconds, peak / 1024 ** 2
+
+
+def run_benchmarks(scales: list = (0.01, 0.05), repeat: int = 3, random_state: int = 0, pattern: str = None) -> pd.DataFrame:
+    """Takes in scales of synthetic data and returns table with wall time and peak memory of every benchmark at every scale.
+
+    Keyword arguments:
+    scales -- list of sizes of synthetic tables relative to Kaggle data.
+    repeat -- number of timed calls, the best one is reported.
+    random_state -- seed of synthetic data.
+    pattern -- only benchmarks with this substring in the name are run, all if None.
+    """
+
+    rows = []
+
+    for scale in scales:
+        tables = generate_tables(scale, random_state)
+
+        for name, function in benchmark_cases(tables).items():
+            if pattern and pattern not in name:
+                continue
+
+            seconds, peak = measure(function, repeat)
+            rows.append({"Benchmark": name, "Scale": scale, "Rows": len(tables["application_train"]),
+                         "Wall time, s": seconds, "Peak memory, MB": peak})
+
+    return pd.DataFrame(rows)
+
+
+def save_baseline(results: pd.DataFrame, path: str):
+    """Saves benchmark results as JSON baseline."""
+
+    with open(path, "w") as baseline_file:
+        json.dump(results.to_dict(orient="records"), baseline_file, indent=1)
+
+
+def load_baseline(path: str) -> pd.DataFrame:
+    with open(path) as baseline_file:
+        return pd.DataFrame(json.load(baseline_file))
+
+
+def compare(results: pd.DataFrame, baseline: pd.DataFrame, tolerance: float = 0.2) -> pd.DataFrame:
+    """Takes in benchmark results and baseline and returns table with ratios of wall time and peak memory
+    to the baseline. Benchmark is flagged as regression if either ratio exceeds 1 + tolerance.
+    """
+
+    comparison = results.merge(baseline[["Benchmark", "Scale", "Wall time, s", "Peak memory, MB"]],
+                               on=["Benchmark", "Scale"], how="left", suffixes=("", " (baseline)"))
+    comparison["Time ratio"] = comparison["Wall time, s"] / comparison["Wall time, s (baseline)"]
+    comparison["Memory ratio"] = comparison["Peak memory, MB"] / comparison["Peak memory, MB (baseline)"]
+    comparison["Regression"] = (comparison["Time ratio"] > 1 + tolerance) | (comparison["Memory ratio"] > 1 + tolerance)
+
+    return comparison.sort_values(by="Time ratio", ascending=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark custom transformers and functions on synthetic Home Credit data.")
+    parser.add_argument("--scales", type=float, nargs="+", default=[0.01, 0.05], help="sizes of synthetic tables relative to Kaggle data")
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed calls of every benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="seed of synthetic data")
+    parser.add_argument("--only", default=None, help="run only benchmarks with this substring in the name")
+    parser.add_argument("--baseline", default=None, help="JSON file with baseline results")
+    parser.add_argument("--save", action="store_true", help="save results as the new baseline, requires --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown or memory growth")
+    args = parser.parse_args()
+
+    if args.save and not args.baseline:
+        parser.error("--save requires --baseline")
+
+    results = run_benchmarks(args.scales, args.repeat, args.seed, args.only)
+
+    if args.baseline and args.save:
+        save_baseline(results, args.baseline)
+        print(results.to_string(index=False))
+        return
+
+    if not args.baseline:
+        print(results.to_string(index=False))
+        return
+
+    comparison = compare(results, load_baseline(args.baseline), args.tolerance)
+    print(comparison.to_string(index=False))
+
+    if comparison["Regression"].any():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,388 +1,853 @@
-import numpy as np
-import pandas as pd
-
-def blend_organization_type(input_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe and returns pandas dataframe with 
-    blended values of ORGANIZATION_TYPE feature.
-    """
-    
-    result = input_df.copy()
-    
-    condlist = [result["ORGANIZATION_TYPE"].str.startswith("Business") == True,
-                result["ORGANIZATION_TYPE"].str.startswith("Trade") == True,
-                result["ORGANIZATION_TYPE"].str.startswith("Transport") == True,
-                result["ORGANIZATION_TYPE"].str.startswith("Industry") == True]
-
-    choicelist = ["Business", "Trade", "Transport", "Industry"]
-
-    result["ORGANIZATION_TYPE"] = np.select(condlist, choicelist, result["ORGANIZATION_TYPE"])
-    
-    return result
-
-
-def credit_card_dpd(input_df: pd.DataFrame, credit_card_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline, additional dataframe with credit cards information
-    and returns input dataframe with additional column with DPD flag values.
-    
-    Keyword arguments:
-    input_df -- primary dataframe from sklearn pipeline.
-    credit_card_df -- additional dataframe with information about credit cards. 
-    """
-    
-    result = input_df.copy()
-    
-    credit_card_dpd = credit_card_df[(credit_card_df["MONTHS_BALANCE"] > -12) & (credit_card_df["NAME_CONTRACT_STATUS"] == "Active")][["SK_ID_CURR", "SK_DPD"]]
-    credit_card_dpd["FLAG_DPD"] = [1 if x > 0 else 0 for x in credit_card_dpd["SK_DPD"]]
-    count_credit_card_dpd = credit_card_dpd.groupby("SK_ID_CURR")["FLAG_DPD"].sum().reset_index()
-
-    result = pd.merge(result, count_credit_card_dpd, on="SK_ID_CURR", how="left").fillna(0)
-    
-    return result
-
-
-def pos_cash_dpd(input_df: pd.DataFrame, pos_cash_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline and additional dataframe with information of 
-    POS (point of sales) and cash loans and returns input dataframe with additional column with sum of DPD.
-    
-    Keyword arguments:
-    input_df -- primary dataframe from sklearn pipeline.
-    pos_cash_df -- additional dataframe with information about POS (point of sales) and cash loans. 
-    """
-    
-    result = input_df.copy()
-    
-    pos_cash_dpd = pos_cash_df[(pos_cash_df["MONTHS_BALANCE"] > -12) & (pos_cash_df["NAME_CONTRACT_STATUS"] == "Active")].groupby("SK_ID_CURR")["SK_DPD"].sum().reset_index()
-
-    result = pd.merge(result, pos_cash_dpd, on="SK_ID_CURR", how="left").fillna(0)
-    
-    return result
-
-
-def flag_insurance(input_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline and returns input dataframe with FLAG_INSURANCE column."""
-    
-    result = input_df.copy()
-    
-    result["FLAG_INSURANCE"] = np.where(result["AMT_CREDIT"] - result["AMT_GOODS_PRICE"] > 0, 1, 0)
-    
-    return result
-
-
-def credit_card_drawings(input_df: pd.DataFrame, credit_card_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline and additional dataframe with credit cards information and 
-    returns input dataframe with additional column with total amount of drawings for the last half of year.
-    
-    Keyword arguments:
-    input_df -- primary dataframe from sklearn pipeline.
-    credit_card_df -- additional dataframe with information about credit cards. 
-    """
-    
-    result = input_df.copy()
-    
-    credit_card_drawings = credit_card_df[["SK_ID_CURR", "AMT_DRAWINGS_ATM_CURRENT", "AMT_DRAWINGS_CURRENT", "AMT_DRAWINGS_OTHER_CURRENT", "AMT_DRAWINGS_POS_CURRENT", "MONTHS_BALANCE"]].fillna(0)
-    credit_card_drawings["ALL_DRAWINGS"] = credit_card_drawings[credit_card_drawings["MONTHS_BALANCE"] > -7].iloc[:,-4:].sum(axis=1)
-    credit_card_drawings = credit_card_drawings.groupby("SK_ID_CURR")["ALL_DRAWINGS"].sum().reset_index()
-    result = pd.merge(result, credit_card_drawings, on="SK_ID_CURR", how="left").fillna(0)
-    
-    return result
-
-
-def flag_insurance(input_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline and returns input dataframe with FLAG_INSURANCE column."""
-    
-    result = input_df.copy()
-    
-    result["FLAG_INSURANCE"] = np.where(result["AMT_CREDIT"] - result["AMT_GOODS_PRICE"] > 0, 1, 0)
-    
-    return result
-
-
-def pandas_binning(input_df: pd.DataFrame, feature: str, bins: list, labels: list) -> pd.DataFrame:
-    """Takes in pandas dataframe within scikit-learn pipeline and 
-    returns input dataframe with binned values of specified feature.
-    
-    Keyword arguments:
-    input_df -- primary dataframe within sklearn pipeline.
-    feature -- name of the binning feature.
-    bins -- list of bins used in pandas cut function.
-    labels -- list of labels used in pandas cut function. 
-    """
-    
-    result = input_df.copy()
-    
-    result[feature] = pd.cut(result[feature] , bins=bins, labels=labels, include_lowest=True).astype(object)
-    
-    return result
-
-
-def bureau_credit_type_counter(input_df: pd.DataFrame, bureau_df: pd.DataFrame, scarce_values: list) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline and additional dataframe with data provided by other financial institutions 
-    and returns input dataframe with additional column with count of different credit type for each client.
-    
-    Keyword arguments:
-    input_df -- primary dataframe within sklearn pipeline.
-    bureau_df -- additional dataframe with data provided by other financial institutions.
-    scarce_values -- list of values which should be named under one name. 
-    """
-    
-    result = input_df.copy()
-    
-    bureau_credit_type = bureau_df[["SK_ID_CURR", "CREDIT_TYPE"]]
-    bureau_credit_type["CREDIT_TYPE"] = np.where(bureau_credit_type["CREDIT_TYPE"]
-                                                 .isin(scarce_values), "Other", bureau_credit_type["CREDIT_TYPE"])
-    bureau_credit_type = (pd.get_dummies(bureau_credit_type[["SK_ID_CURR", "CREDIT_TYPE"]], prefix="BUREAU_CREDIT")
-                          .groupby("SK_ID_CURR")
-                          .sum()
-                          .reset_index())
-    
-    result = pd.merge(result, bureau_credit_type, on="SK_ID_CURR", how="left").fillna(0)
-    
-    return result
-
-
-def prev_credit_type_counter(input_df: pd.DataFrame, previous_application_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline and additional dataframe with data about previous applications 
-    and returns input dataframe with additional column with count of different credit type for each client.
-    
-    Keyword arguments:
-    input_df -- primary dataframe within sklearn pipeline.
-    previous_application_df -- additional dataframe with data about previous applications in Home Credit. 
-    """
-    
-    result = input_df.copy()
-    
-    prev_app_type = previous_application_df[["SK_ID_CURR", "NAME_CONTRACT_TYPE"]]
-    prev_app_type = (pd.get_dummies(prev_app_type[["SK_ID_CURR", "NAME_CONTRACT_TYPE"]], prefix="PREV_APP")
-                     .groupby("SK_ID_CURR")
-                     .sum()
-                     .reset_index())
-    
-    result = pd.merge(result, prev_app_type, on="SK_ID_CURR", how="left").fillna(0)
-    
-    return result
-
-
-def prev_flag_insurance(input_df: pd.DataFrame, previous_application_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline and additional dataframe with data about previous applications 
-    and returns input dataframe with additional column with insurance flag for previous application.
-    
-    Keyword arguments:
-    input_df -- primary dataframe within sklearn pipeline.
-    previous_application_df -- additional dataframe with data about previous applications in Home Credit. 
-    """
-    
-    result = input_df.copy()
-    
-    flag_previous_insurance = previous_application_df.groupby("SK_ID_CURR")["NFLAG_INSURED_ON_APPROVAL"].max().reset_index()
-    
-    result = pd.merge(result, flag_previous_insurance, on="SK_ID_CURR", how="left").fillna(0)
-    
-    return result
-
-
-def annuity_income_ratio(input_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline and returns input dataframe
-    with additional column ANNUITY_VERSUS_INCOME.
-    """
-    
-    result = input_df.copy()
-    
-    result["ANNUITY_VS_INCOME"] = result["AMT_ANNUITY"] / result["AMT_INCOME_TOTAL"] * 100
-    
-    return result
-
-
-def prev_annuity_income_ratio(input_df: pd.DataFrame, previous_application_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline and additional dataframe with data about previous applications 
-    and returns input dataframe with additional column PREV_ANNUITY_VERSUS_INCOME.
-    
-    Keyword arguments:
-    input_df -- primary dataframe within sklearn pipeline.
-    previous_application_df -- additional dataframe with data about previous applications in Home Credit. 
-    """
-    
-    result = input_df.copy()
-    
-    avg_previous_annuity = (previous_application_df
-                            .groupby("SK_ID_CURR")["AMT_ANNUITY"]
-                            .mean()
-                            .reset_index()
-                            .rename(columns={"AMT_ANNUITY": "PREV_ANNUITY"}))
-
-    result = pd.merge(result, avg_previous_annuity, on="SK_ID_CURR", how="left").fillna(0)
-
-    result["PREV_ANNUITY_VS_INCOME"] = result["PREV_ANNUITY"] / result["AMT_INCOME_TOTAL"] * 100
-    
-    return result
-
-
-def enquiries(input_df: pd.DataFrame, enquiries_list: list) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline and list of columns' name and returns 
-    input dataframe with additional column AMT_REQ_CREDIT_BUREAU - number of all 
-    enquiries to Credit Bureau about the client before application.
-    
-    Keyword arguments:
-    input_df -- primary dataframe within sklearn pipeline.
-    enquiries_list -- list of columns' name about enquirties. 
-    """
-    
-    result = input_df.copy()
-    
-    result["AMT_REQ_CREDIT_BUREAU"] = 0
-    
-    for enquire in enquiries_list:
-        result["AMT_REQ_CREDIT_BUREAU"] += result[enquire]
-    
-    return result
-
-
-def prev_dpd_flag(input_df: pd.DataFrame, bureau_balance_df: pd.DataFrame, bureau_df: pd.DataFrame, dpd_notation: list) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline, two additional dataframes with information about previous credits 
-    provided by other financial institutions and list of DPD notations and returns input dataframe with additional column DPD_STATUS.
-    
-    Keyword arguments:
-    input_df -- primary dataframe within sklearn pipeline.
-    bureau_df - additional dataframe with information about previous credits provided by other financial institutions.
-    bureau_balance_df - additional dataframe with information about monthly balances of previous credits.
-    enquiries_list -- list of columns' name about enquirties. 
-    """
-    
-    result = input_df.copy()
-    
-    bureau_balance_df["DPD_STATUS"] = np.where(bureau_balance_df["STATUS"].isin(dpd_notation), 1, 0)
-    bureau_dpd_status = bureau_balance_df.groupby("SK_ID_BUREAU")["DPD_STATUS"].sum().reset_index()
-    
-    bureau_balance_dpd = pd.merge(bureau_df, bureau_dpd_status, on="SK_ID_BUREAU", how="left").fillna(0)
-    bureau_balance_dpd = bureau_balance_dpd.groupby("SK_ID_CURR")["DPD_STATUS"].sum().reset_index()
-    
-    result = pd.merge(result, bureau_balance_dpd, on="SK_ID_CURR", how="left").fillna(0)
-    
-    return result
-
-
-def down_payment_rate(input_df: pd.DataFrame, previous_application_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline, additional dataframe with data about previous applications
-    and returns input dataframe with additional column RATE_DOWN_PAYMENT.
-    
-    Keyword arguments:
-    input_df -- primary dataframe within sklearn pipeline.
-    previous_application_df - additional dataframe with data about previous applications in Home Credit. 
-    """
-    
-    result = input_df.copy()
-    
-    down_payment_rate = (previous_application_df[["SK_ID_CURR", "RATE_DOWN_PAYMENT"]]
-                         .groupby("SK_ID_CURR")["RATE_DOWN_PAYMENT"]
-                         .mean()
-                         .reset_index())
-    
-    result = pd.merge(result, down_payment_rate, on="SK_ID_CURR", how="left").fillna(0)
-    
-    return result
-
-
-def installments_version(input_df: pd.DataFrame, installments_payments_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline, additional dataframe with data about repayment history for 
-    the previously disbursed credits in Home Credit and returns input dataframe with additional column NUM_INSTALMENT_VERSION.
-    
-    Keyword arguments:
-    input_df -- primary dataframe within sklearn pipeline.
-    installments_payments_df - additional dataframe with data about repayment history for the previously disbursed credits in Home Credit. 
-    """
-    
-    result = input_df.copy()
-    
-    installments_payments_df["INSTALMENT_VERSION_CHANGE"] = np.where((installments_payments_df["NUM_INSTALMENT_VERSION"] > 1), 1, 0)
-    avg_installment_version = (installments_payments_df[installments_payments_df["INSTALMENT_VERSION_CHANGE"] == 1]
-                               .groupby("SK_ID_CURR")["NUM_INSTALMENT_VERSION"]
-                               .mean()
-                               .reset_index())
-    
-    result = pd.merge(result, avg_installment_version, on="SK_ID_CURR", how="left").fillna(0)
-    
-    return result
-
-
-def debt_income_ratio(input_df: pd.DataFrame, bureau_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline, additional dataframe with data provided by other financial institutions
-    and returns input dataframe with additional column with ratio of client's total monthly debt and monthly income.
-    
-    Keyword arguments:
-    input_df -- primary dataframe within sklearn pipeline.
-    bureau_df - additional dataframe with information about previous credits provided by other financial institutions. 
-    """
-    
-    result = input_df.copy()
-    
-    bureau_debt = (bureau_df[(bureau_df["AMT_CREDIT_SUM_DEBT"] > 0)
-                             & (bureau_df["CREDIT_ACTIVE"] == "Active")
-                             & (bureau_df["DAYS_CREDIT_ENDDATE"] > 0)]
-                   .groupby("SK_ID_CURR")[["AMT_CREDIT_SUM_DEBT", "DAYS_CREDIT_ENDDATE"]]
-                   .sum()
-                   .reset_index())
-    bureau_debt["CREDIT_DEBT_ANNUITY"] = bureau_debt["AMT_CREDIT_SUM_DEBT"] / (bureau_debt["DAYS_CREDIT_ENDDATE"] / 30)
-    
-    result = pd.merge(result, bureau_debt, on="SK_ID_CURR", how="left").fillna(0)
-    
-    result["TOTAL_ANNUITY"] = result["CREDIT_DEBT_ANNUITY"] + result["AMT_ANNUITY"]
-    result["INCOME_DEBT_RATIO"] = result["TOTAL_ANNUITY"] / result["AMT_INCOME_TOTAL"] * 100
-
-    result = result.drop(columns=["AMT_CREDIT_SUM_DEBT", "DAYS_CREDIT_ENDDATE", "CREDIT_DEBT_ANNUITY", "TOTAL_ANNUITY"])
-    
-    return result
-
-
-def client_social_circle(input_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline, sums up OBS_30_CNT_SOCIAL_CIRCLE with OBS_60_CNT_SOCIAL_CIRCLE,
-    DEF_30_CNT_SOCIAL_CIRCLE with DEF_60_CNT_SOCIAL_CIRCLE and returns input dataframe with two new columns
-    OBS_CNT_SOCIAL_CIRCLE and DEF_CNT_SOCIAL_CIRCLE. Also drops aforementioned primary columns.
-    """
-    
-    result = input_df.copy()
-    
-    result["OBS_CNT_SOCIAL_CIRCLE"] = result["OBS_30_CNT_SOCIAL_CIRCLE"] * result["OBS_60_CNT_SOCIAL_CIRCLE"]
-    result["DEF_CNT_SOCIAL_CIRCLE"] = result["DEF_30_CNT_SOCIAL_CIRCLE"] * result["DEF_60_CNT_SOCIAL_CIRCLE"]
-    
-    result = result.drop(columns=["OBS_30_CNT_SOCIAL_CIRCLE", "OBS_60_CNT_SOCIAL_CIRCLE",
-                                  "DEF_30_CNT_SOCIAL_CIRCLE", "DEF_60_CNT_SOCIAL_CIRCLE"])
-    
-    return result
-
-
-def drop_id(input_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline and drops SK_ID_CURR column which is irrelevant for final modelling.
-    """
-    
-    result = input_df.copy()
-    
-    result = result.drop(columns=["SK_ID_CURR"])
-    
-    return result
-
-
-def region_rating(input_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline, multiplies REGION_RATING_CLIENT and REGION_RATING_CLIENT_W_CITY values
-    and returns input dataframe with new column REGION_RATING. Also drops aforementioned primary columns.
-    """
-    
-    result = input_df.copy()
-    
-    result["REGION_RATING"] = result["REGION_RATING_CLIENT"] * result["REGION_RATING_CLIENT_W_CITY"]
-    
-    result = result.drop(columns=["REGION_RATING_CLIENT", "REGION_RATING_CLIENT_W_CITY"])
-    
-    return result
-
-
-def external_source(input_df: pd.DataFrame) -> pd.DataFrame:
-    """Takes in pandas dataframe from pipeline, sums up EXT_SOURCE_2 and EXT_SOURCE_3 values
-    and returns input dataframe with new column EXT_SOURCE. Also drops aforementioned primary columns
-    """
-    
-    result = input_df.copy()
-    
-    result["EXT_SOURCE"] = result["EXT_SOURCE_2"] + result["EXT_SOURCE_3"]
-    
-    result = result.drop(columns=["EXT_SOURCE_2", "EXT_SOURCE_3"])
-    
-    return result
\ No newline at end of file
+from typing import Union
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix, csr_matrix, vstack
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+
+from streaming import DEFAULT_CHUNKSIZE, chunked_reduce, is_path, read_chunks
+
+def _attach_columns(input_df: pd.DataFrame, new_columns: dict, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline and dictionary of new columns and returns input dataframe
+    with attached columns. Existing columns of input dataframe are not copied.
+
+    Keyword arguments:
+    input_df -- primary dataframe from sklearn pipeline.
+    new_columns -- dictionary with column names and arrays of values aligned with rows of input dataframe.
+    inplace -- if True, columns are attached to input dataframe itself.
+    """
+
+    result = input_df if inplace else input_df.copy(deep=False)
+
+    for name, values in new_columns.items():
+        if not inplace and name in result.columns:
+            # Replacing a column of a shallow copy could write into the blocks shared with input dataframe.
+            loc = result.columns.get_loc(name)
+            del result[name]
+            result.insert(loc, name, values)
+        else:
+            result[name] = values
+
+    return result
+
+
+def _drop_columns(input_df: pd.DataFrame, columns: list, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline and returns it without specified columns. Remaining columns are not copied."""
+
+    result = input_df if inplace else input_df.copy(deep=False)
+
+    for column in columns:
+        del result[column]
+
+    return result
+
+
+def _join_aggregate(input_df: pd.DataFrame, aggregate: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline and aggregated table with one row per SK_ID_CURR
+    and returns input dataframe with aggregated columns aligned by SK_ID_CURR. Clients without
+    aggregated values get 0, other columns of input dataframe are left as they are.
+
+    Keyword arguments:
+    input_df -- primary dataframe from sklearn pipeline.
+    aggregate -- dataframe indexed by SK_ID_CURR with aggregated values of additional dataframe.
+    inplace -- if True, columns are attached to input dataframe itself.
+    """
+
+    if _is_sparse_frame(aggregate):
+        return _join_sparse_aggregate(input_df, aggregate, inplace)
+
+    aligned = aggregate.reindex(input_df["SK_ID_CURR"].to_numpy()).fillna(0)
+
+    return _attach_columns(input_df, {column: aligned[column].to_numpy() for column in aligned}, inplace)
+
+
+def _is_sparse_frame(dataframe: pd.DataFrame) -> bool:
+    return len(dataframe.columns) > 0 and all(isinstance(dtype, pd.SparseDtype) for dtype in dataframe.dtypes)
+
+
+def _join_sparse_aggregate(input_df: pd.DataFrame, aggregate: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """The same as _join_aggregate for aggregated table with sparse columns. Rows are taken from CSR matrix,
+    so attached columns are sparse as well and their memory scales with number of non-zero values.
+    """
+
+    counts = aggregate.sparse.to_coo().tocsr()
+    # Clients without aggregated values take the appended empty row.
+    counts = vstack([counts, csr_matrix((1, counts.shape[1]), dtype=counts.dtype)], format="csr")
+    positions = aggregate.index.get_indexer(input_df["SK_ID_CURR"].to_numpy())
+    aligned = counts[np.where(positions < 0, counts.shape[0] - 1, positions)]
+    aligned = pd.DataFrame.sparse.from_spmatrix(aligned, columns=aggregate.columns)
+
+    return _attach_columns(input_df, {column: aligned[column].array for column in aligned}, inplace)
+
+
+def _category_counts(keys: pd.Series, categories, prefix: str, sparse: bool = False) -> pd.DataFrame:
+    """Returns count of every category for each key, the same as pd.get_dummies followed by groupby sum, but
+    built from categorical codes with scipy sparse matrix instead of dense table of dummies.
+
+    Keyword arguments:
+    keys -- SK_ID_CURR of every row of additional dataframe.
+    categories -- category of every row, missing values are not counted.
+    prefix -- prefix of column names, column of category is named "{prefix}_{category}".
+    sparse -- if True, columns have pandas SparseDtype and only non-zero counts are stored.
+    """
+
+    key_codes, key_values = pd.factorize(keys, sort=True)
+    categorical = pd.Categorical(categories)
+    valid = (key_codes >= 0) & (categorical.codes >= 0)
+
+    # Duplicate (key, category) pairs are summed when COO matrix is converted to CSR.
+    counts = coo_matrix((np.ones(valid.sum(), dtype=np.int64), (key_codes[valid], categorical.codes[valid])),
+                        shape=(len(key_values), len(categorical.categories))).tocsr()
+    index = pd.Index(key_values, name="SK_ID_CURR")
+    columns = [f"{prefix}_{category}" for category in categorical.categories]
+
+    if sparse:
+        return pd.DataFrame.sparse.from_spmatrix(counts, index=index, columns=columns)
+
+    return pd.DataFrame(counts.toarray(), index=index, columns=columns)
+
+
+def blend_organization_type(input_df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe and returns pandas dataframe with 
+    blended values of ORGANIZATION_TYPE feature.
+    """
+    
+    organization_type = input_df["ORGANIZATION_TYPE"]
+    
+    if isinstance(organization_type.dtype, pd.CategoricalDtype):
+        # Values are blended once per category and rows only get remapped codes. Code -1 (NaN) stays -1.
+        blended = _blend_organization_values(organization_type.cat.categories.to_series())
+        categories = pd.Index(pd.unique(blended))
+        remap = np.append(categories.get_indexer(blended), -1)
+        blended_type = pd.Categorical.from_codes(remap[organization_type.cat.codes.to_numpy()], categories)
+    else:
+        blended_type = _blend_organization_values(organization_type)
+
+    return _attach_columns(input_df, {"ORGANIZATION_TYPE": blended_type}, inplace)
+
+
+def _blend_organization_values(organization_type: pd.Series) -> np.ndarray:
+    """Returns array with blended values of ORGANIZATION_TYPE series."""
+    
+    condlist = [organization_type.str.startswith("Business") == True,
+                organization_type.str.startswith("Trade") == True,
+                organization_type.str.startswith("Transport") == True,
+                organization_type.str.startswith("Industry") == True]
+
+    choicelist = ["Business", "Trade", "Transport", "Industry"]
+
+    return np.select(condlist, choicelist, organization_type)
+
+
+def credit_card_dpd(input_df: pd.DataFrame, credit_card_df: Union[pd.DataFrame, str], inplace: bool = False, chunksize: int = None) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline, additional dataframe with credit cards information
+    and returns input dataframe with additional column with DPD flag values.
+    
+    Keyword arguments:
+    input_df -- primary dataframe from sklearn pipeline.
+    credit_card_df -- additional dataframe with information about credit cards.
+    inplace -- if True, new columns are attached to input dataframe itself instead of its shallow copy.
+    chunksize -- if set or if credit_card_df is a path to CSV file, credit_card_df is read and reduced in chunks of that many rows.
+    """
+
+    return _join_aggregate(input_df, _credit_card_dpd_aggregate(credit_card_df, chunksize), inplace)
+
+
+def _credit_card_dpd_aggregate(credit_card_df: Union[pd.DataFrame, str], chunksize: int = None) -> pd.DataFrame:
+    """Returns count of active credit card months with DPD during the last year for each SK_ID_CURR."""
+
+    if chunksize is not None or is_path(credit_card_df):
+        chunks = read_chunks(credit_card_df, ["SK_ID_CURR", "MONTHS_BALANCE", "NAME_CONTRACT_STATUS", "SK_DPD"], chunksize or DEFAULT_CHUNKSIZE)
+        return chunked_reduce(chunks, _credit_card_dpd_aggregate)
+
+    credit_card_dpd = credit_card_df[(credit_card_df["MONTHS_BALANCE"] > -12) & (credit_card_df["NAME_CONTRACT_STATUS"] == "Active")][["SK_ID_CURR", "SK_DPD"]]
+    credit_card_dpd = credit_card_dpd.assign(FLAG_DPD=np.where(credit_card_dpd["SK_DPD"] > 0, 1, 0))
+    count_credit_card_dpd = credit_card_dpd.groupby("SK_ID_CURR")["FLAG_DPD"].sum().to_frame()
+
+    return count_credit_card_dpd
+
+
+def pos_cash_dpd(input_df: pd.DataFrame, pos_cash_df: Union[pd.DataFrame, str], inplace: bool = False, chunksize: int = None) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline and additional dataframe with information of 
+    POS (point of sales) and cash loans and returns input dataframe with additional column with sum of DPD.
+    
+    Keyword arguments:
+    input_df -- primary dataframe from sklearn pipeline.
+    pos_cash_df -- additional dataframe with information about POS (point of sales) and cash loans.
+    inplace -- if True, new columns are attached to input dataframe itself instead of its shallow copy.
+    chunksize -- if set or if pos_cash_df is a path to CSV file, pos_cash_df is read and reduced in chunks of that many rows.
+    """
+
+    return _join_aggregate(input_df, _pos_cash_dpd_aggregate(pos_cash_df, chunksize), inplace)
+
+
+def _pos_cash_dpd_aggregate(pos_cash_df: Union[pd.DataFrame, str], chunksize: int = None) -> pd.DataFrame:
+    """Returns sum of DPD of active POS and cash loans during the last year for each SK_ID_CURR."""
+
+    if chunksize is not None or is_path(pos_cash_df):
+        chunks = read_chunks(pos_cash_df, ["SK_ID_CURR", "MONTHS_BALANCE", "NAME_CONTRACT_STATUS", "SK_DPD"], chunksize or DEFAULT_CHUNKSIZE)
+        return chunked_reduce(chunks, _pos_cash_dpd_aggregate)
+
+    pos_cash_dpd = pos_cash_df[(pos_cash_df["MONTHS_BALANCE"] > -12) & (pos_cash_df["NAME_CONTRACT_STATUS"] == "Active")].groupby("SK_ID_CURR")["SK_DPD"].sum().to_frame()
+
+    return pos_cash_dpd
+
+
+def flag_insurance(input_df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline and returns input dataframe with FLAG_INSURANCE column."""
+    
+    flag = np.where(input_df["AMT_CREDIT"] - input_df["AMT_GOODS_PRICE"] > 0, 1, 0)
+    
+    return _attach_columns(input_df, {"FLAG_INSURANCE": flag}, inplace)
+
+
+def credit_card_drawings(input_df: pd.DataFrame, credit_card_df: Union[pd.DataFrame, str], inplace: bool = False, chunksize: int = None) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline and additional dataframe with credit cards information and 
+    returns input dataframe with additional column with total amount of drawings for the last half of year.
+    
+    Keyword arguments:
+    input_df -- primary dataframe from sklearn pipeline.
+    credit_card_df -- additional dataframe with information about credit cards.
+    inplace -- if True, new columns are attached to input dataframe itself instead of its shallow copy.
+    chunksize -- if set or if credit_card_df is a path to CSV file, credit_card_df is read and reduced in chunks of that many rows.
+    """
+
+    return _join_aggregate(input_df, _credit_card_drawings_aggregate(credit_card_df, chunksize), inplace)
+
+
+def _credit_card_drawings_aggregate(credit_card_df: Union[pd.DataFrame, str], chunksize: int = None) -> pd.DataFrame:
+    """Returns total amount of credit card drawings for the last half of year for each SK_ID_CURR."""
+
+    columns = ["SK_ID_CURR", "AMT_DRAWINGS_ATM_CURRENT", "AMT_DRAWINGS_CURRENT", "AMT_DRAWINGS_OTHER_CURRENT", "AMT_DRAWINGS_POS_CURRENT", "MONTHS_BALANCE"]
+
+    if chunksize is not None or is_path(credit_card_df):
+        return chunked_reduce(read_chunks(credit_card_df, columns, chunksize or DEFAULT_CHUNKSIZE), _credit_card_drawings_aggregate)
+
+    credit_card_drawings = credit_card_df[columns].fillna(0)
+    credit_card_drawings["ALL_DRAWINGS"] = credit_card_drawings[credit_card_drawings["MONTHS_BALANCE"] > -7].iloc[:,-4:].sum(axis=1)
+    credit_card_drawings = credit_card_drawings.groupby("SK_ID_CURR")["ALL_DRAWINGS"].sum().to_frame()
+
+    return credit_card_drawings
+
+
+def flag_insurance(input_df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline and returns input dataframe with FLAG_INSURANCE column."""
+    
+    flag = np.where(input_df["AMT_CREDIT"] - input_df["AMT_GOODS_PRICE"] > 0, 1, 0)
+    
+    return _attach_columns(input_df, {"FLAG_INSURANCE": flag}, inplace)
+
+
+def pandas_binning(input_df: pd.DataFrame, feature: str, bins: list, labels: list, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe within scikit-learn pipeline and 
+    returns input dataframe with binned values of specified feature.
+    
+    Keyword arguments:
+    input_df -- primary dataframe within sklearn pipeline.
+    feature -- name of the binning feature.
+    bins -- list of bins used in pandas cut function.
+    labels -- list of labels used in pandas cut function. 
+    inplace -- if True, binned values replace the feature in input dataframe itself.
+    """
+    
+    binned = pd.cut(input_df[feature].to_numpy(), bins=bins, labels=labels, include_lowest=True).astype(object)
+    
+    return _attach_columns(input_df, {feature: np.asarray(binned)}, inplace)
+
+
+def bureau_credit_type_counter(input_df: pd.DataFrame, bureau_df: pd.DataFrame, scarce_values: list, inplace: bool = False,
+                               sparse: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline and additional dataframe with data provided by other financial institutions 
+    and returns input dataframe with additional column with count of different credit type for each client.
+    
+    Keyword arguments:
+    input_df -- primary dataframe within sklearn pipeline.
+    bureau_df -- additional dataframe with data provided by other financial institutions.
+    scarce_values -- list of values which should be named under one name.
+    inplace -- if True, new columns are attached to input dataframe itself instead of its shallow copy.
+    sparse -- if True, count columns have pandas SparseDtype, see sparse_preprocessor in functions.py.
+    """
+
+    return _join_aggregate(input_df, _bureau_credit_type_counter_aggregate(bureau_df, scarce_values, sparse), inplace)
+
+
+def _bureau_credit_type_counter_aggregate(bureau_df: pd.DataFrame, scarce_values: list, sparse: bool = False) -> pd.DataFrame:
+    """Returns count of different credit types in other financial institutions for each SK_ID_CURR."""
+
+    credit_type = np.where(bureau_df["CREDIT_TYPE"].isin(scarce_values), "Other", bureau_df["CREDIT_TYPE"])
+
+    return _category_counts(bureau_df["SK_ID_CURR"], credit_type, "BUREAU_CREDIT", sparse)
+
+
+def prev_credit_type_counter(input_df: pd.DataFrame, previous_application_df: pd.DataFrame, inplace: bool = False,
+                             sparse: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline and additional dataframe with data about previous applications 
+    and returns input dataframe with additional column with count of different credit type for each client.
+    
+    Keyword arguments:
+    input_df -- primary dataframe within sklearn pipeline.
+    previous_application_df -- additional dataframe with data about previous applications in Home Credit.
+    inplace -- if True, new columns are attached to input dataframe itself instead of its shallow copy.
+    sparse -- if True, count columns have pandas SparseDtype, see sparse_preprocessor in functions.py.
+    """
+
+    return _join_aggregate(input_df, _prev_credit_type_counter_aggregate(previous_application_df, sparse), inplace)
+
+
+def _prev_credit_type_counter_aggregate(previous_application_df: pd.DataFrame, sparse: bool = False) -> pd.DataFrame:
+    """Returns count of different credit types in previous applications of Home Credit for each SK_ID_CURR."""
+
+    return _category_counts(previous_application_df["SK_ID_CURR"], previous_application_df["NAME_CONTRACT_TYPE"],
+                            "PREV_APP", sparse)
+
+
+def prev_flag_insurance(input_df: pd.DataFrame, previous_application_df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline and additional dataframe with data about previous applications 
+    and returns input dataframe with additional column with insurance flag for previous application.
+    
+    Keyword arguments:
+    input_df -- primary dataframe within sklearn pipeline.
+    previous_application_df -- additional dataframe with data about previous applications in Home Credit.
+    inplace -- if True, new columns are attached to input dataframe itself instead of its shallow copy.
+    """
+
+    return _join_aggregate(input_df, _prev_flag_insurance_aggregate(previous_application_df), inplace)
+
+
+def _prev_flag_insurance_aggregate(previous_application_df: pd.DataFrame) -> pd.DataFrame:
+    """Returns insurance flag of previous applications for each SK_ID_CURR."""
+
+    flag_previous_insurance = previous_application_df.groupby("SK_ID_CURR")["NFLAG_INSURED_ON_APPROVAL"].max().to_frame()
+
+    return flag_previous_insurance
+
+
+def annuity_income_ratio(input_df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline and returns input dataframe
+    with additional column ANNUITY_VERSUS_INCOME.
+    """
+    
+    ratio = (input_df["AMT_ANNUITY"] / input_df["AMT_INCOME_TOTAL"] * 100).to_numpy()
+    
+    return _attach_columns(input_df, {"ANNUITY_VS_INCOME": ratio}, inplace)
+
+
+def prev_annuity_income_ratio(input_df: pd.DataFrame, previous_application_df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline and additional dataframe with data about previous applications 
+    and returns input dataframe with additional column PREV_ANNUITY_VERSUS_INCOME.
+    
+    Keyword arguments:
+    input_df -- primary dataframe within sklearn pipeline.
+    previous_application_df -- additional dataframe with data about previous applications in Home Credit.
+    inplace -- if True, new columns are attached to input dataframe itself instead of its shallow copy.
+    """
+
+    result = _join_aggregate(input_df, _prev_annuity_income_ratio_aggregate(previous_application_df), inplace)
+
+    return _prev_annuity_income_ratio_finish(result)
+
+
+def _prev_annuity_income_ratio_aggregate(previous_application_df: pd.DataFrame) -> pd.DataFrame:
+    """Returns average annuity of previous applications for each SK_ID_CURR."""
+
+    avg_previous_annuity = (previous_application_df
+                            .groupby("SK_ID_CURR")["AMT_ANNUITY"]
+                            .mean()
+                            .to_frame("PREV_ANNUITY"))
+
+    return avg_previous_annuity
+
+
+def _prev_annuity_income_ratio_finish(result: pd.DataFrame) -> pd.DataFrame:
+    """Adds PREV_ANNUITY_VS_INCOME column to dataframe with joined PREV_ANNUITY column."""
+
+    result["PREV_ANNUITY_VS_INCOME"] = result["PREV_ANNUITY"] / result["AMT_INCOME_TOTAL"] * 100
+
+    return result
+
+
+def enquiries(input_df: pd.DataFrame, enquiries_list: list, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline and list of columns' name and returns 
+    input dataframe with additional column AMT_REQ_CREDIT_BUREAU - number of all 
+    enquiries to Credit Bureau about the client before application.
+    
+    Keyword arguments:
+    input_df -- primary dataframe within sklearn pipeline.
+    enquiries_list -- list of columns' name about enquirties. 
+    inplace -- if True, new column is attached to input dataframe itself instead of its shallow copy.
+    """
+    
+    total_enquiries = 0
+    
+    for enquire in enquiries_list:
+        total_enquiries = total_enquiries + input_df[enquire]
+    
+    return _attach_columns(input_df, {"AMT_REQ_CREDIT_BUREAU": np.asarray(total_enquiries)}, inplace)
+
+
+def prev_dpd_flag(input_df: pd.DataFrame, bureau_balance_df: Union[pd.DataFrame, str], bureau_df: pd.DataFrame, dpd_notation: list, inplace: bool = False, chunksize: int = None) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline, two additional dataframes with information about previous credits 
+    provided by other financial institutions and list of DPD notations and returns input dataframe with additional column DPD_STATUS.
+    
+    Keyword arguments:
+    input_df -- primary dataframe within sklearn pipeline.
+    bureau_df - additional dataframe with information about previous credits provided by other financial institutions.
+    bureau_balance_df - additional dataframe with information about monthly balances of previous credits.
+    dpd_notation -- list of STATUS values which mean DPD.
+    inplace -- if True, new columns are attached to input dataframe itself instead of its shallow copy.
+    chunksize -- if set or if bureau_balance_df is a path to CSV file, bureau_balance_df is read and reduced in chunks of that many rows.
+    """
+
+    return _join_aggregate(input_df, _prev_dpd_flag_aggregate(bureau_balance_df, bureau_df, dpd_notation, chunksize), inplace)
+
+
+def _prev_dpd_flag_aggregate(bureau_balance_df: Union[pd.DataFrame, str], bureau_df: pd.DataFrame, dpd_notation: list, chunksize: int = None) -> pd.DataFrame:
+    """Returns count of months with DPD of credits in other financial institutions for each SK_ID_CURR.
+    Months are counted per SK_ID_BUREAU first and mapped to SK_ID_CURR through bureau_df afterwards.
+    """
+
+    if chunksize is not None or is_path(bureau_balance_df):
+        chunks = read_chunks(bureau_balance_df, ["SK_ID_BUREAU", "STATUS"], chunksize or DEFAULT_CHUNKSIZE, dtype={"STATUS": str})
+        bureau_dpd_status = chunked_reduce(chunks, lambda chunk: _bureau_dpd_status(chunk, dpd_notation))
+    else:
+        bureau_dpd_status = _bureau_dpd_status(bureau_balance_df, dpd_notation)
+
+    dpd_status = bureau_df["SK_ID_BUREAU"].map(bureau_dpd_status["DPD_STATUS"]).fillna(0).rename("DPD_STATUS")
+    bureau_balance_dpd = dpd_status.groupby(bureau_df["SK_ID_CURR"]).sum().to_frame()
+
+    return bureau_balance_dpd
+
+
+def _bureau_dpd_status(bureau_balance_df: pd.DataFrame, dpd_notation: list) -> pd.DataFrame:
+    """Returns count of months with DPD for each SK_ID_BUREAU."""
+
+    dpd_status = pd.Series(np.where(bureau_balance_df["STATUS"].isin(dpd_notation), 1, 0), index=bureau_balance_df.index, name="DPD_STATUS")
+
+    return dpd_status.groupby(bureau_balance_df["SK_ID_BUREAU"]).sum().to_frame()
+
+
+def down_payment_rate(input_df: pd.DataFrame, previous_application_df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline, additional dataframe with data about previous applications
+    and returns input dataframe with additional column RATE_DOWN_PAYMENT.
+    
+    Keyword arguments:
+    input_df -- primary dataframe within sklearn pipeline.
+    previous_application_df - additional dataframe with data about previous applications in Home Credit.
+    inplace -- if True, new columns are attached to input dataframe itself instead of its shallow copy.
+    """
+
+    return _join_aggregate(input_df, _down_payment_rate_aggregate(previous_application_df), inplace)
+
+
+def _down_payment_rate_aggregate(previous_application_df: pd.DataFrame) -> pd.DataFrame:
+    """Returns average down payment rate of previous applications for each SK_ID_CURR."""
+
+    down_payment_rate = (previous_application_df[["SK_ID_CURR", "RATE_DOWN_PAYMENT"]]
+                         .groupby("SK_ID_CURR")["RATE_DOWN_PAYMENT"]
+                         .mean()
+                         .to_frame())
+
+    return down_payment_rate
+
+
+def installments_version(input_df: pd.DataFrame, installments_payments_df: Union[pd.DataFrame, str], inplace: bool = False, chunksize: int = None) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline, additional dataframe with data about repayment history for 
+    the previously disbursed credits in Home Credit and returns input dataframe with additional column NUM_INSTALMENT_VERSION.
+    
+    Keyword arguments:
+    input_df -- primary dataframe within sklearn pipeline.
+    installments_payments_df - additional dataframe with data about repayment history for the previously disbursed credits in Home Credit.
+    inplace -- if True, new columns are attached to input dataframe itself instead of its shallow copy.
+    chunksize -- if set or if installments_payments_df is a path to CSV file, installments_payments_df is read and reduced in chunks of that many rows.
+    """
+
+    return _join_aggregate(input_df, _installments_version_aggregate(installments_payments_df, chunksize), inplace)
+
+
+def _installments_version_aggregate(installments_payments_df: Union[pd.DataFrame, str], chunksize: int = None) -> pd.DataFrame:
+    """Returns average version of changed installment calendars for each SK_ID_CURR."""
+
+    if chunksize is not None or is_path(installments_payments_df):
+        chunks = read_chunks(installments_payments_df, ["SK_ID_CURR", "NUM_INSTALMENT_VERSION"], chunksize or DEFAULT_CHUNKSIZE)
+        versions = chunked_reduce(chunks, _installments_version_sums)
+        return (versions["sum"] / versions["count"]).rename("NUM_INSTALMENT_VERSION").to_frame()
+
+    avg_installment_version = (installments_payments_df[installments_payments_df["NUM_INSTALMENT_VERSION"] > 1]
+                               .groupby("SK_ID_CURR")["NUM_INSTALMENT_VERSION"]
+                               .mean()
+                               .to_frame())
+
+    return avg_installment_version
+
+
+def _installments_version_sums(installments_payments_df: pd.DataFrame) -> pd.DataFrame:
+    """Returns sum and count of versions of changed installment calendars for each SK_ID_CURR."""
+
+    changed = installments_payments_df[installments_payments_df["NUM_INSTALMENT_VERSION"] > 1]
+
+    return changed.groupby("SK_ID_CURR")["NUM_INSTALMENT_VERSION"].agg(["sum", "count"])
+
+
+def debt_income_ratio(input_df: pd.DataFrame, bureau_df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline, additional dataframe with data provided by other financial institutions
+    and returns input dataframe with additional column with ratio of client's total monthly debt and monthly income.
+    
+    Keyword arguments:
+    input_df -- primary dataframe within sklearn pipeline.
+    bureau_df - additional dataframe with information about previous credits provided by other financial institutions.
+    inplace -- if True, new columns are attached to input dataframe itself instead of its shallow copy.
+    """
+
+    result = _join_aggregate(input_df, _debt_income_ratio_aggregate(bureau_df), inplace)
+
+    return _debt_income_ratio_finish(result)
+
+
+def _debt_income_ratio_aggregate(bureau_df: pd.DataFrame) -> pd.DataFrame:
+    """Returns total debt and monthly debt annuity of active credits in other financial institutions for each SK_ID_CURR."""
+
+    bureau_debt = (bureau_df[(bureau_df["AMT_CREDIT_SUM_DEBT"] > 0)
+                             & (bureau_df["CREDIT_ACTIVE"] == "Active")
+                             & (bureau_df["DAYS_CREDIT_ENDDATE"] > 0)]
+                   .groupby("SK_ID_CURR")[["AMT_CREDIT_SUM_DEBT", "DAYS_CREDIT_ENDDATE"]]
+                   .sum())
+    bureau_debt["CREDIT_DEBT_ANNUITY"] = bureau_debt["AMT_CREDIT_SUM_DEBT"] / (bureau_debt["DAYS_CREDIT_ENDDATE"] / 30)
+
+    return bureau_debt
+
+
+def _debt_income_ratio_finish(result: pd.DataFrame) -> pd.DataFrame:
+    """Adds INCOME_DEBT_RATIO column to dataframe with joined bureau debt columns and drops auxiliary columns."""
+
+    result["TOTAL_ANNUITY"] = result["CREDIT_DEBT_ANNUITY"] + result["AMT_ANNUITY"]
+    result["INCOME_DEBT_RATIO"] = result["TOTAL_ANNUITY"] / result["AMT_INCOME_TOTAL"] * 100
+
+    # Result is either a shallow copy made by _join_aggregate or, in inplace mode, input dataframe itself.
+    result = _drop_columns(result, ["AMT_CREDIT_SUM_DEBT", "DAYS_CREDIT_ENDDATE", "CREDIT_DEBT_ANNUITY", "TOTAL_ANNUITY"], inplace=True)
+    
+    return result
+
+
+def client_social_circle(input_df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline, sums up OBS_30_CNT_SOCIAL_CIRCLE with OBS_60_CNT_SOCIAL_CIRCLE,
+    DEF_30_CNT_SOCIAL_CIRCLE with DEF_60_CNT_SOCIAL_CIRCLE and returns input dataframe with two new columns
+    OBS_CNT_SOCIAL_CIRCLE and DEF_CNT_SOCIAL_CIRCLE. Also drops aforementioned primary columns.
+    """
+    
+    observed = input_df["OBS_30_CNT_SOCIAL_CIRCLE"] * input_df["OBS_60_CNT_SOCIAL_CIRCLE"]
+    defaulted = input_df["DEF_30_CNT_SOCIAL_CIRCLE"] * input_df["DEF_60_CNT_SOCIAL_CIRCLE"]
+    
+    result = _attach_columns(input_df, {"OBS_CNT_SOCIAL_CIRCLE": observed.to_numpy(), "DEF_CNT_SOCIAL_CIRCLE": defaulted.to_numpy()}, inplace)
+    
+    result = _drop_columns(result, ["OBS_30_CNT_SOCIAL_CIRCLE", "OBS_60_CNT_SOCIAL_CIRCLE",
+                                    "DEF_30_CNT_SOCIAL_CIRCLE", "DEF_60_CNT_SOCIAL_CIRCLE"], inplace=True)
+    
+    return result
+
+
+def drop_id(input_df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline and drops SK_ID_CURR column which is irrelevant for final modelling.
+    """
+    
+    return _drop_columns(input_df, ["SK_ID_CURR"], inplace)
+
+
+def region_rating(input_df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline, multiplies REGION_RATING_CLIENT and REGION_RATING_CLIENT_W_CITY values
+    and returns input dataframe with new column REGION_RATING. Also drops aforementioned primary columns.
+    """
+    
+    rating = (input_df["REGION_RATING_CLIENT"] * input_df["REGION_RATING_CLIENT_W_CITY"]).to_numpy()
+    
+    result = _attach_columns(input_df, {"REGION_RATING": rating}, inplace)
+    result = _drop_columns(result, ["REGION_RATING_CLIENT", "REGION_RATING_CLIENT_W_CITY"], inplace=True)
+    
+    return result
+
+
+def external_source(input_df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+    """Takes in pandas dataframe from pipeline, sums up EXT_SOURCE_2 and EXT_SOURCE_3 values
+    and returns input dataframe with new column EXT_SOURCE. Also drops aforementioned primary columns
+    """
+    
+    external = (input_df["EXT_SOURCE_2"] + input_df["EXT_SOURCE_3"]).to_numpy()
+    
+    result = _attach_columns(input_df, {"EXT_SOURCE": external}, inplace)
+    result = _drop_columns(result, ["EXT_SOURCE_2", "EXT_SOURCE_3"], inplace=True)
+    
+    return result
+
+
+class SideTableTransformer(BaseEstimator, TransformerMixin):
+    """Base class for transformers which add aggregated values of additional dataframe to the pipeline dataframe.
+    Aggregated table with one row per SK_ID_CURR is calculated once in fit and kept as aggregate_ attribute,
+    so transform only joins it on SK_ID_CURR. Subclasses take inplace argument which is passed to the join.
+    """
+
+    def fit(self, X: pd.DataFrame, y: pd.Series = None):
+        self.aggregate_ = self._aggregate()
+
+        return self
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        check_is_fitted(self, "aggregate_")
+
+        return self._finish(_join_aggregate(X, self.aggregate_, self.inplace))
+
+    def _aggregate(self) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def _finish(self, result: pd.DataFrame) -> pd.DataFrame:
+        return result
+
+
+class CreditCardDPD(SideTableTransformer):
+    """Stateful version of credit_card_dpd.
+
+    Keyword arguments:
+    credit_card_df -- additional dataframe with information about credit cards.
+    inplace -- if True, new columns are attached to dataframe from pipeline itself.
+    chunksize -- if set or if credit_card_df is a path to CSV file, credit_card_df is read and reduced in chunks of that many rows.
+    """
+
+    def __init__(self, credit_card_df: Union[pd.DataFrame, str], inplace: bool = False, chunksize: int = None):
+        self.credit_card_df = credit_card_df
+        self.inplace = inplace
+        self.chunksize = chunksize
+
+    def _aggregate(self) -> pd.DataFrame:
+        return _credit_card_dpd_aggregate(self.credit_card_df, self.chunksize)
+
+
+class PosCashDPD(SideTableTransformer):
+    """Stateful version of pos_cash_dpd.
+
+    Keyword arguments:
+    pos_cash_df -- additional dataframe with information about POS (point of sales) and cash loans.
+    inplace -- if True, new columns are attached to dataframe from pipeline itself.
+    chunksize -- if set or if pos_cash_df is a path to CSV file, pos_cash_df is read and reduced in chunks of that many rows.
+    """
+
+    def __init__(self, pos_cash_df: Union[pd.DataFrame, str], inplace: bool = False, chunksize: int = None):
+        self.pos_cash_df = pos_cash_df
+        self.inplace = inplace
+        self.chunksize = chunksize
+
+    def _aggregate(self) -> pd.DataFrame:
+        return _pos_cash_dpd_aggregate(self.pos_cash_df, self.chunksize)
+
+
+class CreditCardDrawings(SideTableTransformer):
+    """Stateful version of credit_card_drawings.
+
+    Keyword arguments:
+    credit_card_df -- additional dataframe with information about credit cards.
+    inplace -- if True, new columns are attached to dataframe from pipeline itself.
+    chunksize -- if set or if credit_card_df is a path to CSV file, credit_card_df is read and reduced in chunks of that many rows.
+    """
+
+    def __init__(self, credit_card_df: Union[pd.DataFrame, str], inplace: bool = False, chunksize: int = None):
+        self.credit_card_df = credit_card_df
+        self.inplace = inplace
+        self.chunksize = chunksize
+
+    def _aggregate(self) -> pd.DataFrame:
+        return _credit_card_drawings_aggregate(self.credit_card_df, self.chunksize)
+
+
+class BureauCreditTypeCounter(SideTableTransformer):
+    """Stateful version of bureau_credit_type_counter.
+
+    Keyword arguments:
+    bureau_df -- additional dataframe with data provided by other financial institutions.
+    scarce_values -- list of values which should be named under one name.
+    inplace -- if True, new columns are attached to dataframe from pipeline itself.
+    sparse -- if True, count columns have pandas SparseDtype.
+    """
+
+    def __init__(self, bureau_df: pd.DataFrame, scarce_values: list, inplace: bool = False, sparse: bool = False):
+        self.bureau_df = bureau_df
+        self.scarce_values = scarce_values
+        self.inplace = inplace
+        self.sparse = sparse
+
+    def _aggregate(self) -> pd.DataFrame:
+        return _bureau_credit_type_counter_aggregate(self.bureau_df, self.scarce_values, self.sparse)
+
+
+class PrevCreditTypeCounter(SideTableTransformer):
+    """Stateful version of prev_credit_type_counter.
+
+    Keyword arguments:
+    previous_application_df -- additional dataframe with data about previous applications in Home Credit.
+    inplace -- if True, new columns are attached to dataframe from pipeline itself.
+    sparse -- if True, count columns have pandas SparseDtype.
+    """
+
+    def __init__(self, previous_application_df: pd.DataFrame, inplace: bool = False, sparse: bool = False):
+        self.previous_application_df = previous_application_df
+        self.inplace = inplace
+        self.sparse = sparse
+
+    def _aggregate(self) -> pd.DataFrame:
+        return _prev_credit_type_counter_aggregate(self.previous_application_df, self.sparse)
+
+
+class PrevFlagInsurance(SideTableTransformer):
+    """Stateful version of prev_flag_insurance.
+
+    Keyword arguments:
+    previous_application_df -- additional dataframe with data about previous applications in Home Credit.
+    inplace -- if True, new columns are attached to dataframe from pipeline itself.
+    """
+
+    def __init__(self, previous_application_df: pd.DataFrame, inplace: bool = False):
+        self.previous_application_df = previous_application_df
+        self.inplace = inplace
+
+    def _aggregate(self) -> pd.DataFrame:
+        return _prev_flag_insurance_aggregate(self.previous_application_df)
+
+
+class PrevAnnuityIncomeRatio(SideTableTransformer):
+    """Stateful version of prev_annuity_income_ratio.
+
+    Keyword arguments:
+    previous_application_df -- additional dataframe with data about previous applications in Home Credit.
+    inplace -- if True, new columns are attached to dataframe from pipeline itself.
+    """
+
+    def __init__(self, previous_application_df: pd.DataFrame, inplace: bool = False):
+        self.previous_application_df = previous_application_df
+        self.inplace = inplace
+
+    def _aggregate(self) -> pd.DataFrame:
+        return _prev_annuity_income_ratio_aggregate(self.previous_application_df)
+
+    def _finish(self, result: pd.DataFrame) -> pd.DataFrame:
+        return _prev_annuity_income_ratio_finish(result)
+
+
+class PrevDPDFlag(SideTableTransformer):
+    """Stateful version of prev_dpd_flag.
+
+    Keyword arguments:
+    bureau_balance_df - additional dataframe with information about monthly balances of previous credits.
+    bureau_df - additional dataframe with information about previous credits provided by other financial institutions.
+    dpd_notation -- list of STATUS values which mean DPD.
+    inplace -- if True, new columns are attached to dataframe from pipeline itself.
+    chunksize -- if set or if bureau_balance_df is a path to CSV file, bureau_balance_df is read and reduced in chunks of that many rows.
+    """
+
+    def __init__(self, bureau_balance_df: Union[pd.DataFrame, str], bureau_df: pd.DataFrame, dpd_notation: list, inplace: bool = False, chunksize: int = None):
+        self.bureau_balance_df = bureau_balance_df
+        self.bureau_df = bureau_df
+        self.dpd_notation = dpd_notation
+        self.inplace = inplace
+        self.chunksize = chunksize
+
+    def _aggregate(self) -> pd.DataFrame:
+        return _prev_dpd_flag_aggregate(self.bureau_balance_df, self.bureau_df, self.dpd_notation, self.chunksize)
+
+
+class DownPaymentRate(SideTableTransformer):
+    """Stateful version of down_payment_rate.
+
+    Keyword arguments:
+    previous_application_df - additional dataframe with data about previous applications in Home Credit.
+    inplace -- if True, new columns are attached to dataframe from pipeline itself.
+    """
+
+    def __init__(self, previous_application_df: pd.DataFrame, inplace: bool = False):
+        self.previous_application_df = previous_application_df
+        self.inplace = inplace
+
+    def _aggregate(self) -> pd.DataFrame:
+        return _down_payment_rate_aggregate(self.previous_application_df)
+
+
+class InstallmentsVersion(SideTableTransformer):
+    """Stateful version of installments_version.
+
+    Keyword arguments:
+    installments_payments_df - additional dataframe with data about repayment history for the previously disbursed credits in Home Credit.
+    inplace -- if True, new columns are attached to dataframe from pipeline itself.
+    chunksize -- if set or if installments_payments_df is a path to CSV file, installments_payments_df is read and reduced in chunks of that many rows.
+    """
+
+    def __init__(self, installments_payments_df: Union[pd.DataFrame, str], inplace: bool = False, chunksize: int = None):
+        self.installments_payments_df = installments_payments_df
+        self.inplace = inplace
+        self.chunksize = chunksize
+
+    def _aggregate(self) -> pd.DataFrame:
+        return _installments_version_aggregate(self.installments_payments_df, self.chunksize)
+
+
+class DebtIncomeRatio(SideTableTransformer):
+    """Stateful version of debt_income_ratio.
+
+    Keyword arguments:
+    bureau_df - additional dataframe with information about previous credits provided by other financial institutions.
+    inplace -- if True, new columns are attached to dataframe from pipeline itself.
+    """
+
+    def __init__(self, bureau_df: pd.DataFrame, inplace: bool = False):
+        self.bureau_df = bureau_df
+        self.inplace = inplace
+
+    def _aggregate(self) -> pd.DataFrame:
+        return _debt_income_ratio_aggregate(self.bureau_df)
+
+    def _finish(self, result: pd.DataFrame) -> pd.DataFrame:
+        return _debt_income_ratio_finish(result)
+
+
+class DistinctValuesImputer(BaseEstimator, TransformerMixin):
+    """Fills NaNs of specified columns with values drawn at random from the most frequent values of those columns.
+    The most frequent values are the smallest set of top values which covers more than coef fraction of
+    non-missing samples. They are learned in fit from a single value_counts per column.
+
+    Keyword arguments:
+    columns -- list of columns with missing values.
+    coef -- coeficient that specifies the number of most frequent values.
+    random_state -- seed of numpy random generator, so the same data is always filled the same way.
+    inplace -- if True, NaNs are filled in dataframe from pipeline itself.
+    """
+
+    def __init__(self, columns: list, coef: float = 0.5, random_state: int = None, inplace: bool = False):
+        self.columns = columns
+        self.coef = coef
+        self.random_state = random_state
+        self.inplace = inplace
+
+    def fit(self, X: pd.DataFrame, y: pd.Series = None):
+        self.values_ = {}
+
+        for column in self.columns:
+            counts = X[column].value_counts()
+
+            if counts.empty:
+                raise ValueError(f"Column {column} has no values to impute from.")
+
+            cumulative = counts.to_numpy().cumsum()
+            top_values = np.searchsorted(cumulative, cumulative[-1] * self.coef, side="right") + 1
+
+            self.values_[column] = counts.index.to_numpy()[:top_values]
+
+        return self
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        check_is_fitted(self, "values_")
+
+        generator = np.random.default_rng(self.random_state)
+        filled_columns = {}
+
+        for column, values in self.values_.items():
+            filled = X[column].to_numpy(copy=True)
+            missing = np.flatnonzero(pd.isna(filled))
+            filled[missing] = values[generator.integers(len(values), size=len(missing))]
+            filled_columns[column] = filled
+
+        return _attach_columns(X, filled_columns, self.inplace)
\ No newline at end of file
@@ -0,0 +1,136 @@
+import json
+import os
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from functions import optimize_dtypes
+
+DATA_DIR = "data"
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+
+TABLES = ("application_train", "application_test", "bureau", "bureau_balance", "pos_cash_balance",
+          "credit_card_balance", "previous_application", "installments_payments")
+
+# Tables which go into the pipelines, whose ColumnTransformer selects string columns by object dtype.
+APPLICATION_TABLES = ("application_train", "application_test")
+
+# Version of compaction rules, stored with signature of compacted tables, so tables compacted by older rules are converted again.
+COMPACT_VERSION = 2
+
+
+def _source_signature(csv_path: str) -> dict:
+    stat = os.stat(csv_path)
+
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _is_fresh(cache_path: str, meta_path: str, signature: dict) -> bool:
+    if not (os.path.exists(cache_path) and os.path.exists(meta_path)):
+        return False
+
+    with open(meta_path) as meta_file:
+        return json.load(meta_file).get("source") == signature
+
+
+def _write_cache(name: str, csv_path: str, cache_path: str, meta_path: str, signature: dict, compact: bool):
+    """Converts CSV file to uncompressed Feather file, which can be memory-mapped, and saves signature of the source."""
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+
+    table = pd.read_csv(csv_path)
+
+    if compact:
+        table, _ = optimize_dtypes(table, max_categories=None if name in APPLICATION_TABLES else 100)
+
+    # Files are written under temporary names first, so interrupted conversion never leaves a fresh-looking cache.
+    feather.write_feather(table, cache_path + ".tmp", compression="uncompressed")
+    os.replace(cache_path + ".tmp", cache_path)
+
+    with open(meta_path + ".tmp", "w") as meta_file:
+        json.dump({"source": signature, "rows": len(table)}, meta_file)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def load_table(name: str, columns: list = None, compact: bool = False, data_dir: str = DATA_DIR, cache_dir: str = None) -> pd.DataFrame:
+    """Takes in name of Home Credit table and returns it as pandas dataframe. CSV file is converted
+    to columnar Feather file on the first call and the Feather file is reused while size and modification
+    time of CSV file stay the same. Feather file is memory-mapped, so only requested columns are read.
+
+    Keyword arguments:
+    name -- name of the table, one of TABLES. CSV file is expected at "{data_dir}/{name}.csv".
+    columns -- list of columns to read, all columns if None.
+    compact -- if True, dtypes are compacted by functions.optimize_dtypes before caching, string columns of application
+    tables stay object. Compacted table is cached separately.
+    data_dir -- directory with CSV files.
+    cache_dir -- directory with Feather files, "{data_dir}/cache" if None.
+    """
+
+    if name not in TABLES:
+        raise ValueError(f"Unknown table {name!r}, expected one of {TABLES}.")
+
+    cache_dir = cache_dir or os.path.join(data_dir, "cache")
+    csv_path = os.path.join(data_dir, f"{name}.csv")
+    suffix = ".compact" if compact else ""
+    cache_path = os.path.join(cache_dir, f"{name}{suffix}.feather")
+    meta_path = os.path.join(cache_dir, f"{name}{suffix}.json")
+
+    signature = _source_signature(csv_path)
+    if compact:
+        signature["compact_version"] = COMPACT_VERSION
+
+    if not _is_fresh(cache_path, meta_path, signature):
+        _write_cache(name, csv_path, cache_path, meta_path, signature, compact)
+
+    table = feather.read_table(cache_path, columns=columns, memory_map=True)
+
+    # split_blocks keeps numeric columns as separate blocks backed by the memory-mapped file instead of copying them into one block.
+    return table.to_pandas(split_blocks=True)
+
+
+def load_application_train(columns: list = None, **kwargs) -> pd.DataFrame:
+    """Returns application_train table. Keyword arguments are the same as in load_table."""
+
+    return load_table("application_train", columns, **kwargs)
+
+
+def load_application_test(columns: list = None, **kwargs) -> pd.DataFrame:
+    """Returns application_test table. Keyword arguments are the same as in load_table."""
+
+    return load_table("application_test", columns, **kwargs)
+
+
+def load_bureau(columns: list = None, **kwargs) -> pd.DataFrame:
+    """Returns bureau table. Keyword arguments are the same as in load_table."""
+
+    return load_table("bureau", columns, **kwargs)
+
+
+def load_bureau_balance(columns: list = None, **kwargs) -> pd.DataFrame:
+    """Returns bureau_balance table. Keyword arguments are the same as in load_table."""
+
+    return load_table("bureau_balance", columns, **kwargs)
+
+
+def load_pos_cash_balance(columns: list = None, **kwargs) -> pd.DataFrame:
+    """Returns pos_cash_balance table. Keyword arguments are the same as in load_table."""
+
+    return load_table("pos_cash_balance", columns, **kwargs)
+
+
+def load_credit_card_balance(columns: list = None, **kwargs) -> pd.DataFrame:
+    """Returns credit_card_balance table. Keyword arguments are the same as in load_table."""
+
+    return load_table("credit_card_balance", columns, **kwargs)
+
+
+def load_previous_application(columns: list = None, **kwargs) -> pd.DataFrame:
+    """Returns previous_application table. Keyword arguments are the same as in load_table."""
+
+    return load_table("previous_application", columns, **kwargs)
+
+
+def load_installments_payments(columns: list = None, **kwargs) -> pd.DataFrame:
+    """Returns installments_payments table. Keyword arguments are the same as in load_table."""
+
+    return load_table("installments_payments", columns, **kwargs)
\ No newline at end of file
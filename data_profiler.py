@@ -0,0 +1,263 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DATA_DIR, TABLES
+
+# Default number of distinct values whose counts a column profile keeps.
+MAX_VALUES = 100_000
+
+# Number of registers of cardinality sketch is 2 ** SKETCH_PRECISION, standard error of estimate is about 1.04 / sqrt(2 ** 14) = 0.8%.
+SKETCH_PRECISION = 14
+
+
+def _sketch_ranks(values: np.ndarray) -> tuple:
+    """Returns HyperLogLog registers and ranks of hashed values: register is the first SKETCH_PRECISION bits of
+    the hash and rank is position of the first set bit of the remaining bits.
+    """
+
+    hashes = pd.util.hash_array(values)
+    rest_bits = 64 - SKETCH_PRECISION
+    registers = (hashes >> np.uint64(rest_bits)).astype(np.intp)
+    # Remaining bits are below 2 ** 50, so their bit length is exact exponent of float64.
+    rest = (hashes & np.uint64((1 << rest_bits) - 1)).astype(np.float64)
+
+    return registers, (rest_bits - np.frexp(rest)[1] + 1).astype(np.uint8)
+
+
+class ColumnProfile:
+    """Mergeable statistics of one column: number of rows and NaN values, counts of distinct values and min/max
+    of numeric values. Profiles of separate chunks of the same column are combined with merge.
+
+    Memory does not grow with number of distinct values: when there are more than max_values of them, only counts
+    of max_values most frequent ones are kept. Counts of the most frequent value are then lower bounds and cardinality
+    is estimated by HyperLogLog sketch of all values.
+
+    Keyword arguments:
+    max_values -- maximum number of distinct values whose counts are kept.
+    """
+
+    def __init__(self, max_values: int = MAX_VALUES):
+        self.max_values = max_values
+        self.rows = 0
+        self.nan_values = 0
+        self.value_counts = pd.Series(dtype=np.int64)
+        self.truncated = False
+        self.sketch = np.zeros(2 ** SKETCH_PRECISION, dtype=np.uint8)
+        self.min = None
+        self.max = None
+
+    def update(self, column: pd.Series):
+        """Adds statistics of the next chunk of the column."""
+
+        counts = column.value_counts()
+
+        self.rows += len(column)
+        self.nan_values += len(column) - int(counts.sum())
+        self._add(counts)
+
+        if len(counts):
+            registers, ranks = _sketch_ranks(counts.index.to_numpy())
+            np.maximum.at(self.sketch, registers, ranks)
+
+        if pd.api.types.is_numeric_dtype(column) and len(counts):
+            self._update_range(counts.index.min(), counts.index.max())
+
+    def merge(self, other: "ColumnProfile"):
+        """Adds statistics of another profile of the same column."""
+
+        self.rows += other.rows
+        self.nan_values += other.nan_values
+        self.truncated |= other.truncated
+        self._add(other.value_counts)
+        np.maximum(self.sketch, other.sketch, out=self.sketch)
+
+        if other.min is not None:
+            self._update_range(other.min, other.max)
+
+    def _add(self, counts: pd.Series):
+        self.value_counts = _add_counts(self.value_counts, counts)
+
+        if len(self.value_counts) > self.max_values:
+            self.value_counts = self.value_counts.nlargest(self.max_values)
+            self.truncated = True
+
+    def cardinality(self) -> int:
+        """Returns number of distinct values, estimated by the sketch when not all of them are counted."""
+
+        if not self.truncated:
+            return len(self.value_counts)
+
+        n_registers = len(self.sketch)
+        alpha = 0.7213 / (1 + 1.079 / n_registers)
+        estimate = alpha * n_registers ** 2 / np.sum(np.ldexp(1.0, -self.sketch.astype(np.int64)))
+        empty = int(np.count_nonzero(self.sketch == 0))
+
+        if estimate <= 2.5 * n_registers and empty:
+            estimate = n_registers * np.log(n_registers / empty)
+
+        return max(int(round(estimate)), len(self.value_counts))
+
+    def _update_range(self, minimum, maximum):
+        self.min = minimum if self.min is None else min(self.min, minimum)
+        self.max = maximum if self.max is None else max(self.max, maximum)
+
+    def summary(self) -> dict:
+        most_frequent = int(self.value_counts.max()) if len(self.value_counts) else 0
+
+        return {"Rows": self.rows,
+                "NaN values": self.nan_values,
+                "NaN values, %": self.nan_values / self.rows * 100 if self.rows else 0.0,
+                "Cardinality": self.cardinality(),
+                "QTY of most freq. value": most_frequent,
+                "% of Total Values": most_frequent / self.rows * 100 if self.rows else 0.0,
+                "Min": self.min,
+                "Max": self.max}
+
+
+def _add_counts(counts: pd.Series, other: pd.Series) -> pd.Series:
+    """Returns sum of two value counts. Column which is numeric in one chunk and has strings in another is counted
+    by string values, so that e.g. 1 and "1" are the same value.
+    """
+
+    if not len(counts):
+        return other
+    if not len(other):
+        return counts
+
+    if pd.api.types.is_object_dtype(counts.index) != pd.api.types.is_object_dtype(other.index):
+        counts, other = (series.set_axis(series.index.astype(str)) for series in (counts, other))
+        counts, other = (series.groupby(level=0).sum() for series in (counts, other))
+
+    return counts.add(other, fill_value=0)
+
+
+def _profile_chunks(chunks, columns: list, max_values: int = MAX_VALUES) -> dict:
+    profiles = {column: ColumnProfile(max_values) for column in columns}
+
+    for chunk in chunks:
+        for column in columns:
+            profiles[column].update(chunk[column])
+
+    return profiles
+
+
+def _profile_columns(chunk: pd.DataFrame, max_values: int) -> dict:
+    """Returns profiles of columns of one chunk. Runs in a worker process."""
+
+    return _profile_chunks([chunk], list(chunk.columns), max_values)
+
+
+def _merge_profiles(profiles: dict, part: dict):
+    for column, column_profile in part.items():
+        profiles[column].merge(column_profile)
+
+
+def _profile_table(profiles: dict, columns: list) -> pd.DataFrame:
+    profile = pd.DataFrame([profiles[column].summary() for column in columns])
+    profile.insert(0, "Feature", columns)
+
+    return profile
+
+
+def profile_frame(dataframe: pd.DataFrame, max_values: int = MAX_VALUES) -> pd.DataFrame:
+    """Takes in dataframe and returns table with NaN values, most frequent value share, cardinality
+    and min/max of every column, calculated in one pass over the dataframe. Columns with more than max_values
+    distinct values get estimated cardinality, see ColumnProfile.
+    """
+
+    columns = list(dataframe.columns)
+
+    return _profile_table(_profile_chunks([dataframe], columns, max_values), columns)
+
+
+def profile_csv(csv_path: str, chunksize: int = 1_000_000, n_jobs: int = None, sample_rows: int = 10_000,
+                max_values: int = MAX_VALUES) -> pd.DataFrame:
+    """Takes in path to CSV file and returns the same table as profile_frame without loading the whole file into memory.
+    The file is read once in chunks, column groups of every chunk are profiled in worker processes while the next chunk is read.
+
+    Keyword arguments:
+    csv_path -- path to CSV file.
+    chunksize -- number of rows read at once.
+    n_jobs -- number of worker processes, number of CPUs if None.
+    sample_rows -- number of first rows from which dtypes of columns are taken.
+    max_values -- maximum number of distinct values counted per column, see ColumnProfile.
+    """
+
+    sample = pd.read_csv(csv_path, nrows=sample_rows)
+    columns = list(sample.columns)
+    # Dtypes are inferred for every chunk separately, so column with strings in the sample is read as strings in all chunks.
+    dtype = {column: str for column in columns if pd.api.types.is_object_dtype(sample[column])}
+    chunks = pd.read_csv(csv_path, dtype=dtype, chunksize=chunksize)
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(columns))
+
+    if n_jobs == 1:
+        return _profile_table(_profile_chunks(chunks, columns, max_values), columns)
+
+    column_groups = [list(group) for group in np.array_split(columns, n_jobs)]
+    profiles = {column: ColumnProfile(max_values) for column in columns}
+    pending = []
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        for chunk in chunks:
+            futures = [executor.submit(_profile_columns, chunk[group], max_values) for group in column_groups]
+
+            for future in pending:
+                _merge_profiles(profiles, future.result())
+            pending = futures
+
+        for future in pending:
+            _merge_profiles(profiles, future.result())
+
+    return _profile_table(profiles, columns)
+
+
+def missing_values_table(profile: pd.DataFrame) -> pd.DataFrame:
+    """Takes in table from profile_frame or profile_csv and returns the same table as functions.missing_values."""
+
+    nan_values = profile[["Feature", "NaN values", "NaN values, %"]]
+
+    return nan_values[nan_values["NaN values"] > 0].sort_values(by=["NaN values, %"], ascending=False)
+
+
+def imbalanced_features_table(profile: pd.DataFrame) -> pd.DataFrame:
+    """Takes in table from profile_frame or profile_csv and returns the same table as functions.imbalanced_features."""
+
+    return (profile[["Feature", "QTY of most freq. value", "% of Total Values"]]
+            .rename(columns={"Feature": "Feature Name"})
+            .sort_values(by="% of Total Values", ascending=False))
+
+
+def profile_tables(data_dir: str = DATA_DIR, tables: tuple = TABLES, chunksize: int = 1_000_000, n_jobs: int = None,
+                   max_values: int = MAX_VALUES) -> dict:
+    """Returns dictionary with profiles of Home Credit tables. CSV files are expected at "{data_dir}/{table}.csv"."""
+
+    return {table: profile_csv(os.path.join(data_dir, f"{table}.csv"), chunksize, n_jobs, max_values=max_values) for table in tables}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile all Home Credit tables.")
+    parser.add_argument("data_dir", nargs="?", default=DATA_DIR, help="directory with CSV files")
+    parser.add_argument("--chunksize", type=int, default=1_000_000, help="number of rows read at once")
+    parser.add_argument("--jobs", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--max-values", type=int, default=MAX_VALUES, help="maximum number of distinct values counted per column")
+    parser.add_argument("--output", default=None, help="directory for CSV files with profiles")
+    args = parser.parse_args()
+
+    for table, profile in profile_tables(args.data_dir, chunksize=args.chunksize, n_jobs=args.jobs, max_values=args.max_values).items():
+        print(f"\n{table}\n")
+        print("Missing values:")
+        print(missing_values_table(profile).to_string(index=False))
+        print("\nMost frequent values:")
+        print(imbalanced_features_table(profile).to_string(index=False))
+
+        if args.output:
+            os.makedirs(args.output, exist_ok=True)
+            profile.to_csv(os.path.join(args.output, f"{table}_profile.csv"), index=False)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
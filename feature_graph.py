@@ -0,0 +1,215 @@
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin, clone
+from sklearn.preprocessing import FunctionTransformer
+from sklearn.utils.validation import check_is_fitted
+
+from custom_transformers import SideTableTransformer, _attach_columns, _drop_columns
+
+BACKENDS = ("threads", "processes")
+
+
+def _unfitted_copy(transformer):
+    """Returns copy of transformer which is fitted by FeatureGraph, so that transformers of steps, which are often shared
+    with other pipelines, keep their fitted attributes (e.g. feature_names_in_ of FunctionTransformer). FunctionTransformer
+    and SideTableTransformer are copied shallowly to share side tables in their parameters, other transformers are cloned.
+    """
+
+    if isinstance(transformer, (FunctionTransformer, SideTableTransformer)):
+        return copy.copy(transformer)
+
+    return clone(transformer)
+
+
+@dataclass
+class FeatureStep:
+    """One node of FeatureGraph: transformer with columns which it reads, writes and drops.
+
+    Keyword arguments:
+    name -- name of the step.
+    transformer -- sklearn transformer, for example FunctionTransformer(credit_card_dpd, kw_args=...) or CreditCardDPD(...).
+    inputs -- columns of pipeline dataframe which the transformer reads. Only these columns are passed to it.
+    outputs -- new or replaced columns. None if the step only adds new columns which later steps do not read
+               (for example count columns of bureau_credit_type_counter), then all new columns are taken.
+    drops -- columns which the transformer removes.
+    """
+
+    name: str
+    transformer: object
+    inputs: tuple
+    outputs: Optional[tuple] = None
+    drops: tuple = ()
+
+    @property
+    def writes(self) -> set:
+        return set(self.outputs or ()) | set(self.drops)
+
+
+def _side_table_step(*outputs) -> Callable:
+    return lambda **kw_args: (("SK_ID_CURR",), outputs or None, ())
+
+
+# Columns of custom_transformers.py functions: function name -> function which takes in kw_args and returns (inputs, outputs, drops).
+FEATURE_COLUMNS = {
+    "blend_organization_type": lambda **kw_args: (("ORGANIZATION_TYPE",), ("ORGANIZATION_TYPE",), ()),
+    "credit_card_dpd": _side_table_step("FLAG_DPD"),
+    "pos_cash_dpd": _side_table_step("SK_DPD"),
+    "flag_insurance": lambda **kw_args: (("AMT_CREDIT", "AMT_GOODS_PRICE"), ("FLAG_INSURANCE",), ()),
+    "credit_card_drawings": _side_table_step("ALL_DRAWINGS"),
+    "pandas_binning": lambda feature, **kw_args: ((feature,), (feature,), ()),
+    "bureau_credit_type_counter": _side_table_step(),
+    "prev_credit_type_counter": _side_table_step(),
+    "prev_flag_insurance": _side_table_step("NFLAG_INSURED_ON_APPROVAL"),
+    "annuity_income_ratio": lambda **kw_args: (("AMT_ANNUITY", "AMT_INCOME_TOTAL"), ("ANNUITY_VS_INCOME",), ()),
+    "prev_annuity_income_ratio": lambda **kw_args: (("SK_ID_CURR", "AMT_INCOME_TOTAL"), ("PREV_ANNUITY", "PREV_ANNUITY_VS_INCOME"), ()),
+    "enquiries": lambda enquiries_list, **kw_args: (tuple(enquiries_list), ("AMT_REQ_CREDIT_BUREAU",), ()),
+    "prev_dpd_flag": _side_table_step("DPD_STATUS"),
+    "down_payment_rate": _side_table_step("RATE_DOWN_PAYMENT"),
+    "installments_version": _side_table_step("NUM_INSTALMENT_VERSION"),
+    "debt_income_ratio": lambda **kw_args: (("SK_ID_CURR", "AMT_ANNUITY", "AMT_INCOME_TOTAL"), ("INCOME_DEBT_RATIO",), ()),
+    "client_social_circle": lambda **kw_args: (("OBS_30_CNT_SOCIAL_CIRCLE", "OBS_60_CNT_SOCIAL_CIRCLE", "DEF_30_CNT_SOCIAL_CIRCLE", "DEF_60_CNT_SOCIAL_CIRCLE"),
+                                               ("OBS_CNT_SOCIAL_CIRCLE", "DEF_CNT_SOCIAL_CIRCLE"),
+                                               ("OBS_30_CNT_SOCIAL_CIRCLE", "OBS_60_CNT_SOCIAL_CIRCLE", "DEF_30_CNT_SOCIAL_CIRCLE", "DEF_60_CNT_SOCIAL_CIRCLE")),
+    "drop_id": lambda **kw_args: (("SK_ID_CURR",), (), ("SK_ID_CURR",)),
+    "region_rating": lambda **kw_args: (("REGION_RATING_CLIENT", "REGION_RATING_CLIENT_W_CITY"), ("REGION_RATING",),
+                                        ("REGION_RATING_CLIENT", "REGION_RATING_CLIENT_W_CITY")),
+    "external_source": lambda **kw_args: (("EXT_SOURCE_2", "EXT_SOURCE_3"), ("EXT_SOURCE",), ("EXT_SOURCE_2", "EXT_SOURCE_3")),
+}
+
+
+def feature_step(function, name: str = None, **kw_args) -> FeatureStep:
+    """Takes in function from custom_transformers.py (or FunctionTransformer with such function, e.g. get_credit_card_dpd
+    from the notebook) and returns FeatureStep with its inputs, outputs and dropped columns.
+
+    Keyword arguments:
+    function -- function from FEATURE_COLUMNS or FunctionTransformer with it.
+    name -- name of the step, name of the function if None.
+    kw_args -- keyword arguments of the function, for example credit_card_df=credit_card_balance.
+    """
+
+    if isinstance(function, FunctionTransformer):
+        kw_args = {**(function.kw_args or {}), **kw_args}
+        function = function.func
+
+    inputs, outputs, drops = FEATURE_COLUMNS[function.__name__](**kw_args)
+
+    return FeatureStep(name or function.__name__, FunctionTransformer(function, kw_args=kw_args), inputs, outputs, drops)
+
+
+def feature_levels(steps: list) -> list:
+    """Takes in list of FeatureStep objects and returns list of levels, lists of indexes of steps which can run
+    at the same time. Step waits for every earlier step which writes columns it reads, reads or writes columns it writes,
+    so the result is the same as when steps run one by one in the given order.
+    """
+
+    levels = []
+
+    for i, step in enumerate(steps):
+        level = 0
+
+        for j in range(i):
+            earlier = steps[j]
+            if (set(step.inputs) & earlier.writes) or (step.writes & (set(earlier.inputs) | earlier.writes)):
+                level = max(level, levels[j] + 1)
+
+        levels.append(level)
+
+    return [[i for i, level in enumerate(levels) if level == depth] for depth in range(max(levels, default=-1) + 1)]
+
+
+def _run_step(transformer, X: pd.DataFrame, fit: bool) -> tuple:
+    """Fits (if needed) and applies one transformer. Runs in a worker thread or process."""
+
+    result = transformer.fit_transform(X) if fit else transformer.transform(X)
+
+    return transformer, result
+
+
+def _step_outputs(step: FeatureStep, step_input: pd.DataFrame, step_result: pd.DataFrame) -> dict:
+    """Returns columns which the step wrote and checks that it dropped only declared columns."""
+
+    dropped = set(step_input.columns) - set(step_result.columns)
+
+    if dropped != set(step.drops):
+        raise ValueError(f"Step {step.name} dropped columns {sorted(dropped)}, declared {sorted(step.drops)}.")
+
+    outputs = step.outputs if step.outputs is not None else [column for column in step_result.columns if column not in step_input.columns]
+
+    # .array keeps extension dtypes, e.g. categorical ORGANIZATION_TYPE, and is attached without index alignment.
+    return {column: step_result[column].array for column in outputs}
+
+
+class FeatureGraph(BaseEstimator, TransformerMixin):
+    """Transformer which runs feature steps as a dependency graph. Steps without dependencies between each other
+    (for example joins of different side tables) run at the same time on a pool of workers, their outputs are attached
+    to the pipeline dataframe once per level. Replaces a chain of custom_preprocessor_N steps in log_pipe, sgd_pipe, ada_pipe, etc.
+
+    Keyword arguments:
+    steps -- list of FeatureStep objects in the order in which they would run in the pipeline, e.g. drop_id last.
+    n_jobs -- number of workers, number of CPUs if None.
+    backend -- "threads" or "processes". Processes pickle transformers with their side tables for every call,
+               so threads are usually faster for joins of side tables.
+    inplace -- if True, new columns are attached to dataframe from pipeline itself.
+    """
+
+    def __init__(self, steps: list, n_jobs: int = None, backend: str = "threads", inplace: bool = False):
+        self.steps = steps
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.inplace = inplace
+
+    def fit(self, X: pd.DataFrame, y: pd.Series = None):
+        self.fit_transform(X, y)
+
+        return self
+
+    def fit_transform(self, X: pd.DataFrame, y: pd.Series = None) -> pd.DataFrame:
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {self.backend!r}, expected one of {BACKENDS}.")
+
+        self.levels_ = feature_levels(self.steps)
+        self.transformers_ = [_unfitted_copy(step.transformer) for step in self.steps]
+
+        return self._run(X, fit=True)
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        check_is_fitted(self, "transformers_")
+
+        return self._run(X, fit=False)
+
+    def _run(self, X: pd.DataFrame, fit: bool) -> pd.DataFrame:
+        n_jobs = self.n_jobs or os.cpu_count() or 1
+        widest_level = max((len(level) for level in self.levels_), default=0)
+
+        if n_jobs == 1 or widest_level <= 1:
+            return self._run_levels(X, fit, map)
+
+        executor_class = ThreadPoolExecutor if self.backend == "threads" else ProcessPoolExecutor
+
+        with executor_class(max_workers=min(n_jobs, widest_level)) as executor:
+            return self._run_levels(X, fit, executor.map)
+
+    def _run_levels(self, X: pd.DataFrame, fit: bool, map_function: Callable) -> pd.DataFrame:
+        result = X
+
+        for level in self.levels_:
+            inputs = [result[list(self.steps[i].inputs)] for i in level]
+            outcomes = list(map_function(_run_step, [self.transformers_[i] for i in level], inputs, [fit] * len(level)))
+
+            new_columns = {}
+            drops = []
+
+            for i, step_input, (transformer, step_result) in zip(level, inputs, outcomes):
+                self.transformers_[i] = transformer
+                new_columns.update(_step_outputs(self.steps[i], step_input, step_result))
+                drops.extend(self.steps[i].drops)
+
+            result = _attach_columns(result, new_columns, self.inplace)
+            result = _drop_columns(result, drops, inplace=True)
+
+        return result
\ No newline at end of file
@@ -0,0 +1,261 @@
+import hashlib
+import inspect
+import json
+import os
+import weakref
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.preprocessing import FunctionTransformer
+
+from custom_transformers import _attach_columns, _drop_columns
+from data_loader import CACHE_DIR
+from feature_graph import FEATURE_COLUMNS, _step_outputs, feature_step
+from streaming import is_path
+
+FEATURE_STORE_DIR = os.path.join(CACHE_DIR, "features")
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Keyword arguments which do not change values of features.
+IGNORED_ARGUMENTS = ("inplace", "chunksize")
+
+
+def _frame_fingerprint(dataframe: pd.DataFrame) -> str:
+    """Returns hash of values, order of rows and column names of the dataframe."""
+
+    row_hashes = pd.util.hash_pandas_object(dataframe, index=False).to_numpy()
+    digest = hashlib.sha256(row_hashes.tobytes())
+    digest.update(json.dumps([str(column) for column in dataframe.columns]).encode())
+
+    return digest.hexdigest()
+
+
+def _is_project_object(value) -> bool:
+    """Returns True if function or module is defined in a module of this repository."""
+
+    module = inspect.getmodule(value)
+    path = getattr(module, "__file__", None)
+
+    return path is not None and os.path.dirname(os.path.abspath(path)) == PROJECT_DIR
+
+
+def _code_names(code) -> set:
+    """Returns global names used by code object and by lambdas and nested functions defined in it."""
+
+    names = set(code.co_names)
+
+    for constant in code.co_consts:
+        if inspect.iscode(constant):
+            names |= _code_names(constant)
+
+    return names
+
+
+def _code_fingerprint(function) -> str:
+    """Returns hash of source code of the function and of functions of this repository which it calls, also from
+    other modules, e.g. credit_card_dpd together with _credit_card_dpd_aggregate, _join_aggregate and streaming.chunked_reduce.
+    Modules which the function uses as module.attribute are hashed whole.
+    """
+
+    sources = {}
+    pending = [function]
+
+    while pending:
+        current = pending.pop()
+        key = current.__name__ if inspect.ismodule(current) else f"{current.__module__}.{current.__qualname__}"
+
+        if key in sources:
+            continue
+
+        sources[key] = inspect.getsource(current)
+
+        if inspect.ismodule(current):
+            continue
+
+        for name in _code_names(current.__code__):
+            called = current.__globals__.get(name)
+            if (inspect.isfunction(called) or inspect.ismodule(called)) and _is_project_object(called):
+                pending.append(called)
+
+    return hashlib.sha256(json.dumps(sorted(sources.items())).encode()).hexdigest()
+
+
+class FeatureStore:
+    """On-disk store of features of custom_transformers.py. Every feature is materialized once per dataset split
+    as uncompressed Feather file with the columns which the feature writes. Files are keyed by source code of the
+    feature function, its kw_args, fingerprints of side tables and of input columns of the split, so changing
+    code or parameters of one feature invalidates only that feature. Stored columns are read memory-mapped.
+
+    Fingerprints are computed once per side table and once per column of a split and remembered while the table or
+    the column array exists, so lookup of stored feature does not hash the data again. Columns which steps of a
+    pipeline pass on without copying keep their fingerprints. After a side table or a split is edited in place,
+    invalidate should be called.
+
+    Keyword arguments:
+    root -- directory of the store.
+    """
+
+    def __init__(self, root: str = FEATURE_STORE_DIR):
+        self.root = root
+        self._fingerprints = {}
+
+    def invalidate(self):
+        """Forgets fingerprints of side tables and columns, so they are hashed again. Needed after in-place edits."""
+
+        self._fingerprints.clear()
+
+    def _remembered(self, owner, key, fingerprint) -> str:
+        """Returns fingerprint of key of owner object (dataframe or array), computed by fingerprint function only once.
+        Entry is removed when owner is garbage-collected, so id of a new object never gets its fingerprints.
+        """
+
+        entry = self._fingerprints.get(id(owner))
+
+        if entry is None or entry[0]() is not owner:
+            forget = lambda _, owner_id=id(owner), fingerprints=self._fingerprints: fingerprints.pop(owner_id, None)
+            entry = self._fingerprints[id(owner)] = (weakref.ref(owner, forget), {})
+
+        if key not in entry[1]:
+            entry[1][key] = fingerprint()
+
+        return entry[1][key]
+
+    def _column_fingerprint(self, column: pd.Series) -> str:
+        values = column.to_numpy()
+        # Column is a view of a block array which shallow copies of the dataframe share, so fingerprints are kept by that array.
+        owner = values
+        while isinstance(owner.base, np.ndarray):
+            owner = owner.base
+
+        view = (column.name, values.__array_interface__["data"][0], values.shape, values.strides, str(values.dtype))
+
+        return self._remembered(owner, view, lambda: _frame_fingerprint(column.to_frame()))
+
+    def _input_fingerprint(self, X: pd.DataFrame, columns: list) -> str:
+        # Columns are taken from X one by one, selection of several columns would copy them into new arrays.
+        fingerprints = [self._column_fingerprint(X[column]) for column in columns]
+
+        return hashlib.sha256(json.dumps(fingerprints).encode()).hexdigest()
+
+    def _argument_fingerprint(self, value) -> str:
+        if isinstance(value, pd.DataFrame):
+            return self._remembered(value, "table", lambda: _frame_fingerprint(value))
+
+        if is_path(value) and os.path.exists(value):
+            stat = os.stat(value)
+            return f"{os.path.abspath(value)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+        return repr(value)
+
+    def key(self, function, kw_args: dict, X: pd.DataFrame, columns: list) -> str:
+        """Returns key of the feature computed by function with kw_args from given input columns of X."""
+
+        description = {"function": function.__name__,
+                       "code": _code_fingerprint(function),
+                       "kw_args": {name: self._argument_fingerprint(value) for name, value in sorted(kw_args.items())
+                                   if name not in IGNORED_ARGUMENTS},
+                       "input": self._input_fingerprint(X, columns)}
+
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()[:32]
+
+    def _paths(self, function, key: str) -> tuple:
+        directory = os.path.join(self.root, function.__name__)
+
+        return os.path.join(directory, f"{key}.feather"), os.path.join(directory, f"{key}.json")
+
+    def features(self, function, X: pd.DataFrame, kw_args: dict = None) -> tuple:
+        """Takes in feature function, dataframe from pipeline and kw_args of the function and returns
+        dictionary of columns which the feature writes and list of columns which it drops.
+        Feature is computed and saved only if it is not in the store yet.
+        """
+
+        kw_args = kw_args or {}
+        step = feature_step(function, **{name: value for name, value in kw_args.items() if name not in IGNORED_ARGUMENTS})
+        key = self.key(function, kw_args, X, list(step.inputs))
+        data_path, meta_path = self._paths(function, key)
+
+        if os.path.exists(meta_path):
+            with open(meta_path) as meta_file:
+                meta = json.load(meta_file)
+
+            if not meta["columns"]:
+                return {}, meta["drops"]
+
+            stored = feather.read_table(data_path, memory_map=True).to_pandas(split_blocks=True)
+            sparse = set(meta.get("sparse", []))
+            return ({column: pd.arrays.SparseArray(stored[column].to_numpy(), fill_value=0) if column in sparse else stored[column].array
+                     for column in meta["columns"]}, meta["drops"])
+
+        step_input = X[list(step.inputs)]
+        new_columns = _step_outputs(step, step_input, step.transformer.fit_transform(step_input))
+        self._save(data_path, meta_path, new_columns, list(step.drops), len(X), function)
+
+        return new_columns, list(step.drops)
+
+    @staticmethod
+    def _save(data_path: str, meta_path: str, new_columns: dict, drops: list, rows: int, function):
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+
+        # Feather has no sparse type, so sparse count columns are stored dense and made sparse again when read.
+        sparse = [name for name, values in new_columns.items() if isinstance(values.dtype, pd.SparseDtype)]
+
+        # Files are written under temporary names first, so interrupted run never leaves a half-written feature.
+        if new_columns:
+            dense_columns = {name: values.to_numpy() if name in sparse else values for name, values in new_columns.items()}
+            feather.write_feather(pd.DataFrame(dense_columns), data_path + ".tmp", compression="uncompressed")
+            os.replace(data_path + ".tmp", data_path)
+
+        with open(meta_path + ".tmp", "w") as meta_file:
+            json.dump({"function": function.__name__, "columns": list(new_columns), "drops": drops, "rows": rows, "sparse": sparse}, meta_file)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def transform(self, function, X: pd.DataFrame, kw_args: dict = None, inplace: bool = False) -> pd.DataFrame:
+        """Returns dataframe from pipeline with columns of the feature attached from the store, the same as function(X, **kw_args)."""
+
+        new_columns, drops = self.features(function, X, kw_args)
+        result = _attach_columns(X, new_columns, inplace)
+
+        return _drop_columns(result, drops, inplace=True)
+
+
+class StoredFeature(BaseEstimator, TransformerMixin):
+    """Transformer which takes feature of custom_transformers.py from FeatureStore instead of computing it.
+    Drop-in replacement of FunctionTransformer steps of the pipelines, see stored_feature.
+
+    Keyword arguments:
+    store -- FeatureStore object.
+    function -- feature function from custom_transformers.py, for example prev_credit_type_counter.
+    kw_args -- keyword arguments of the function.
+    inplace -- if True, columns are attached to dataframe from pipeline itself.
+    """
+
+    def __init__(self, store: FeatureStore, function, kw_args: dict = None, inplace: bool = False):
+        self.store = store
+        self.function = function
+        self.kw_args = kw_args
+        self.inplace = inplace
+
+    def fit(self, X: pd.DataFrame, y: pd.Series = None):
+        return self
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        return self.store.transform(self.function, X, self.kw_args, self.inplace)
+
+
+def stored_feature(store: FeatureStore, transformer: FunctionTransformer) -> StoredFeature:
+    """Takes in FeatureStore and FunctionTransformer with feature function, e.g. get_prev_credit_type_counter
+    from the notebook, and returns StoredFeature with the same function and kw_args.
+    """
+
+    return StoredFeature(store, transformer.func, transformer.kw_args)
+
+
+def stored_pipeline_steps(store: FeatureStore, steps: list) -> list:
+    """Takes in FeatureStore and steps of a pipeline and returns the same steps with FunctionTransformer steps
+    of functions from FEATURE_COLUMNS replaced by StoredFeature, so pipelines which share features compute each of them only once.
+    """
+
+    return [(name, stored_feature(store, step) if isinstance(step, FunctionTransformer) and step.func.__name__ in FEATURE_COLUMNS else step)
+            for name, step in steps]
\ No newline at end of file
@@ -1,66 +1,262 @@
-import math
-import random
-
-import numpy as np
-import pandas as pd
-
-def distinct_values(dataframe: pd.DataFrame, col_name: str, coef: float) -> pd.DataFrame:
-    """Takes in dataframe with missing values and randomly fill NaNs of specified column with most frequent values.
-    The most frequent values and total number of them are calculated by coef argument which states the fraction of samples.
-    
-    Keyword arguments:
-    dataframe -- dataframe with missing values.
-    col_name -- name of the column with missing values in given a dataframe.
-    coef -- coeficient that specifies the number of most frequent values.
-    """
-    
-    unique_values = len(dataframe[col_name].value_counts())
-    samples = sum(dataframe[col_name].value_counts())
-    
-    for i in range(unique_values):
-        if sum(dataframe[col_name].value_counts().iloc[:i]) > samples * coef:
-            ext_source_list = dataframe[col_name].value_counts().iloc[:i].reset_index()["index"].to_list()
-            dataframe[col_name] = dataframe[col_name].apply(lambda x: random.choice(ext_source_list) if math.isnan(x) == True else x)
-            return dataframe
-        
-        
-def missing_values(dataframe: pd.DataFrame) -> pd.DataFrame:
-    """Takes in dataframe and returns new dataframe with calculated NaN values and corresponding features.
-    
-    Keyword arguments:
-    dataframe -- dataframe with missing values.
-    """
-    
-    nan_values = dataframe.isna().sum().reset_index().rename(columns={"index": "Feature", 0: "NaN values"})
-    nan_values["NaN values, %"] = nan_values["NaN values"] / len(dataframe) * 100
-    nan_values = nan_values[nan_values["NaN values"] > 0].sort_values(by=["NaN values, %"], ascending=False)
-    
-    return nan_values
-
-
-def export_predictions(id: pd.Series, predictions: np.ndarray, name_prefix: str):
-    """Exports final predictions for submission as a .csv file.
-    
-    Keyword arguments:
-    id -- column as a pandas series with the IDs.
-    predictions -- predictions as an array.
-    name_prefix -- name prefix in final URL. For example "submissions/{name_prefix}_predictions.
-    """
-    
-    output = pd.DataFrame({"SK_ID_CURR": id, "TARGET": predictions[:, 1]})
-    output.to_csv(f"submissions/{name_prefix}_predictions.csv", index=False)
-    
-    
-def imbalanced_features(table: pd.DataFrame) -> pd.DataFrame:
-    """Takes in a table and returns another table with column names 
-    and information about most frequent values in those columns.
-    """
-    
-    feature_names = [column for column in table]
-    qty_most_freq_val = [table[column].value_counts().iloc[0] for column in table]
-    qty_most_freq_val_perc = [table[column].value_counts().iloc[0] / len(table) * 100 for column in table]
-    
-    most_freq_val_table = pd.DataFrame({"Feature Name": feature_names, "QTY of most freq. value": qty_most_freq_val,
-                                        "% of Total Values": qty_most_freq_val_perc}).sort_values(by="% of Total Values", ascending=False)
-    
-    return most_freq_val_table
\ No newline at end of file
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer, make_column_selector
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
+
+from custom_transformers import DistinctValuesImputer, bureau_credit_type_counter, prev_credit_type_counter
+
+def distinct_values(dataframe: pd.DataFrame, col_name: str, coef: float, random_state: int = None) -> pd.DataFrame:
+    """Takes in dataframe with missing values and randomly fill NaNs of specified column with most frequent values.
+    The most frequent values and total number of them are calculated by coef argument which states the fraction of samples.
+    Returns new dataframe, given dataframe is not changed.
+    
+    Keyword arguments:
+    dataframe -- dataframe with missing values.
+    col_name -- name of the column with missing values in given a dataframe.
+    coef -- coeficient that specifies the number of most frequent values.
+    random_state -- seed of numpy random generator.
+    """
+    
+    return DistinctValuesImputer(columns=[col_name], coef=coef, random_state=random_state).fit_transform(dataframe)
+        
+        
+def missing_values(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """Takes in dataframe and returns new dataframe with calculated NaN values and corresponding features.
+    
+    Keyword arguments:
+    dataframe -- dataframe with missing values.
+    """
+    
+    nan_values = dataframe.isna().sum().reset_index().rename(columns={"index": "Feature", 0: "NaN values"})
+    nan_values["NaN values, %"] = nan_values["NaN values"] / len(dataframe) * 100
+    nan_values = nan_values[nan_values["NaN values"] > 0].sort_values(by=["NaN values, %"], ascending=False)
+    
+    return nan_values
+
+
+def export_predictions(id: pd.Series, predictions: np.ndarray, name_prefix: str):
+    """Exports final predictions for submission as a .csv file.
+    
+    Keyword arguments:
+    id -- column as a pandas series with the IDs.
+    predictions -- predictions as an array.
+    name_prefix -- name prefix in final URL. For example "submissions/{name_prefix}_predictions.
+    """
+    
+    output = pd.DataFrame({"SK_ID_CURR": id, "TARGET": predictions[:, 1]})
+    output.to_csv(f"submissions/{name_prefix}_predictions.csv", index=False)
+    
+    
+def imbalanced_features(table: pd.DataFrame) -> pd.DataFrame:
+    """Takes in a table and returns another table with column names 
+    and information about most frequent values in those columns.
+    """
+    
+    feature_names = [column for column in table]
+    qty_most_freq_val = [table[column].value_counts().iloc[0] for column in table]
+    qty_most_freq_val_perc = [qty / len(table) * 100 for qty in qty_most_freq_val]
+    
+    most_freq_val_table = pd.DataFrame({"Feature Name": feature_names, "QTY of most freq. value": qty_most_freq_val,
+                                        "% of Total Values": qty_most_freq_val_perc}).sort_values(by="% of Total Values", ascending=False)
+    
+    return most_freq_val_table
+
+
+FLOAT_PRECISIONS = ("float64", "float32", "auto")
+
+
+def _is_whole_numbers(column: pd.Series) -> bool:
+    if column.isna().any():
+        return False
+
+    values = column.to_numpy(np.float64)
+
+    return bool(np.isfinite(values).all() and np.array_equal(values, np.floor(values)))
+
+
+def _downcast_float(column: pd.Series, float_precision: str) -> pd.Series:
+    """Downcasts float column according to float precision policy."""
+
+    if float_precision == "float64":
+        return column
+
+    downcast = column.astype(np.float32)
+
+    if float_precision == "auto" and not np.array_equal(downcast.to_numpy(np.float64), column.to_numpy(np.float64), equal_nan=True):
+        return column
+
+    return downcast
+
+
+def optimize_dtypes(dataframe: pd.DataFrame, float_precision: str = "float32", max_categories: int = 100,
+                    integer_floats: bool = False, exclude: list = None) -> tuple:
+    """Takes in dataframe and returns new dataframe with compacted dtypes and report with memory usage of every column
+    before and after compaction. Integer columns are downcasted to the smallest signed integer type, so 0/1 columns
+    (e.g. FLAG_*) become int8. Float columns follow float_precision policy and string columns with at most
+    max_categories distinct values become pandas categoricals.
+
+    Categorical columns are not selected by make_column_selector(dtype_include=object) of the notebook pipelines,
+    so string columns of dataframes which go into the pipelines should be kept with max_categories=None.
+
+    Keyword arguments:
+    dataframe -- dataframe to compact.
+    float_precision -- "float64" keeps floats as they are, "float32" downcasts all floats and "auto" downcasts
+    only the columns whose values are all exactly representable as float32.
+    max_categories -- maximum number of distinct values of string column which is converted to categorical.
+    If None, string columns are left as they are.
+    integer_floats -- if True, float columns with only whole numbers and no NaN are downcasted as integers. Products of
+    such narrow integer columns can overflow, so it is off by default.
+    exclude -- list of columns which are left as they are.
+    """
+
+    if float_precision not in FLOAT_PRECISIONS:
+        raise ValueError(f"Unknown float precision {float_precision!r}, expected one of {FLOAT_PRECISIONS}.")
+
+    exclude = set(exclude or [])
+    compacted = {}
+
+    for column_name in dataframe:
+        column = dataframe[column_name]
+
+        if column_name in exclude:
+            compacted[column_name] = column
+        elif pd.api.types.is_bool_dtype(column):
+            compacted[column_name] = column
+        elif pd.api.types.is_integer_dtype(column):
+            compacted[column_name] = pd.to_numeric(column, downcast="integer")
+        elif pd.api.types.is_float_dtype(column):
+            if integer_floats and _is_whole_numbers(column):
+                compacted[column_name] = pd.to_numeric(column.astype(np.int64), downcast="integer")
+            else:
+                compacted[column_name] = _downcast_float(column, float_precision)
+        elif max_categories is not None and pd.api.types.is_object_dtype(column) and column.nunique() <= max_categories:
+            compacted[column_name] = column.astype("category")
+        else:
+            compacted[column_name] = column
+
+    result = pd.DataFrame(compacted, index=dataframe.index)
+
+    memory_before = dataframe.memory_usage(index=False, deep=True)
+    memory_after = result.memory_usage(index=False, deep=True)
+
+    report = pd.DataFrame({"Feature": dataframe.columns,
+                           "Dtype before": dataframe.dtypes.astype(str).to_numpy(),
+                           "Dtype after": result.dtypes.astype(str).to_numpy(),
+                           "Memory before, MB": memory_before.to_numpy() / 1024 ** 2,
+                           "Memory after, MB": memory_after.to_numpy() / 1024 ** 2})
+    report["Saved, %"] = (1 - report["Memory after, MB"] / report["Memory before, MB"]) * 100
+    report = report.sort_values(by="Memory before, MB", ascending=False)
+
+    return result, report
+
+
+def fit_transform_steps(steps: list, X: pd.DataFrame, y: pd.Series = None) -> tuple:
+    """Takes in list of (name, transformer) steps of a pipeline, training features and target and returns
+    features and target after every step is fitted and applied. Samplers (steps with fit_resample) change both of them.
+    """
+
+    for _, step in steps:
+        if step is None or step == "passthrough":
+            continue
+
+        if hasattr(step, "fit_resample"):
+            X, y = step.fit_resample(X, y)
+        else:
+            X = step.fit_transform(X, y)
+
+    return X, y
+
+
+def transform_steps(steps: list, X: pd.DataFrame):
+    """Takes in list of fitted (name, transformer) steps of a pipeline and features and returns transformed features.
+    Samplers are skipped as they are in Pipeline.predict.
+    """
+
+    for _, step in steps:
+        if step is None or step == "passthrough" or hasattr(step, "fit_resample"):
+            continue
+
+        X = step.transform(X)
+
+    return X
+
+
+def sparse_columns(dataframe: pd.DataFrame) -> list:
+    """Returns names of columns with pandas SparseDtype. Can be used as column selector of ColumnTransformer."""
+
+    return [column for column, dtype in dataframe.dtypes.items() if isinstance(dtype, pd.SparseDtype)]
+
+
+def _sparse_frame_to_csr(dataframe: pd.DataFrame) -> csr_matrix:
+    # ColumnTransformer outputs sparse matrix only if one of its transformers does, pandas sparse frame is not enough.
+    return dataframe.sparse.to_coo().tocsr() if len(dataframe.columns) else csr_matrix((len(dataframe), 0))
+
+
+def sparse_preprocessor(drop: str = "if_binary") -> ColumnTransformer:
+    """Returns ColumnTransformer like preprocessor of the notebook which always outputs CSR matrix. Categorical columns
+    are one-hot encoded, sparse count columns (e.g. of bureau_credit_type_counter with sparse=True) are converted
+    to CSR without densifying and the remaining columns are passed through. LGBMClassifier, XGBClassifier,
+    LogisticRegression, SMOTE and StandardScaler(with_mean=False) take the CSR matrix directly.
+
+    Keyword arguments:
+    drop -- drop argument of OneHotEncoder.
+    """
+
+    return ColumnTransformer(
+        transformers=[
+            ("cat_transformer", OneHotEncoder(drop=drop, handle_unknown="ignore"), make_column_selector(dtype_include=[object, "category"])),
+            ("count_transformer", FunctionTransformer(_sparse_frame_to_csr, accept_sparse=True, feature_names_out="one-to-one"), sparse_columns)
+        ],
+        remainder="passthrough",
+        sparse_threshold=1.0
+    )
+
+
+def _sparse_transformer(name: str, transformer):
+    if isinstance(transformer, OneHotEncoder):
+        transformer = clone(transformer)
+        # Parameter is sparse_output since scikit-learn 1.2 and sparse before, dense output would densify the matrix.
+        return transformer.set_params(**{param: True for param in ("sparse_output", "sparse") if transformer.get_params().get(param) is False})
+
+    if isinstance(transformer, str) and transformer in ("passthrough", "drop"):
+        return transformer
+
+    raise ValueError(f"Transformer {name} of ColumnTransformer has no sparse path, expected OneHotEncoder, 'passthrough' or 'drop'.")
+
+
+def _sparse_column_transformer(column_transformer: ColumnTransformer) -> ColumnTransformer:
+    """Returns copy of ColumnTransformer with the same transformers, column selections and remainder, which
+    also converts sparse count columns to CSR and always outputs CSR matrix, as sparse_preprocessor does.
+    """
+
+    transformers = [(name, _sparse_transformer(name, transformer), columns) for name, transformer, columns in column_transformer.transformers]
+    transformers.append(("count_transformer", FunctionTransformer(_sparse_frame_to_csr, accept_sparse=True, feature_names_out="one-to-one"), sparse_columns))
+
+    return clone(column_transformer).set_params(transformers=transformers,
+                                                remainder=_sparse_transformer("remainder", column_transformer.remainder),
+                                                sparse_threshold=1.0)
+
+
+def sparse_pipeline_steps(steps: list) -> list:
+    """Takes in steps of a pipeline from the notebook, e.g. lgbm_pipe.steps, and returns the same steps with sparse path:
+    credit type counters produce sparse columns, ColumnTransformer keeps its encoders and also converts sparse count
+    columns to CSR (see sparse_preprocessor) and StandardScaler does not center the data, because centering would make
+    every value non-zero. Memory of the feature matrix then scales with number of non-zero values instead of rows times categories.
+    """
+
+    sparse_steps = []
+
+    for name, step in steps:
+        if isinstance(step, FunctionTransformer) and step.func in (bureau_credit_type_counter, prev_credit_type_counter):
+            # Parameters are copied without clone, which would deep-copy side tables in kw_args.
+            step = FunctionTransformer(**{**step.get_params(deep=False), "kw_args": {**(step.kw_args or {}), "sparse": True}})
+        elif isinstance(step, ColumnTransformer):
+            step = _sparse_column_transformer(step)
+        elif isinstance(step, StandardScaler):
+            step = clone(step).set_params(with_mean=False)
+
+        sparse_steps.append((name, step))
+
+    return sparse_steps
\ No newline at end of file
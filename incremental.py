@@ -0,0 +1,337 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from aggregations import LINKED_TABLES, WINDOW_TIMES, _active
+
+INCREMENTAL_REDUCTIONS = ("sum", "count", "max", "mean")
+
+
+@dataclass(frozen=True)
+class IncrementalAggregation:
+    """Declarative description of aggregated feature of append-only table which is updated batch by batch.
+
+    Keyword arguments:
+    name -- name of the output column.
+    table -- name of the source table, for example "credit_card_balance".
+    column -- name of the aggregated column or function which takes in batch of the table and returns values to aggregate.
+    reduction -- one of "sum", "count" (number of non-missing values), "max" or "mean".
+    window -- if set, only rows of that many last months before the reference month are aggregated, see IncrementalAggregator.advance.
+    where -- function which takes in batch of the table and returns boolean mask of rows to aggregate.
+    """
+
+    name: str
+    table: str
+    column: Union[str, Callable]
+    reduction: str
+    window: Optional[int] = None
+    where: Optional[Callable] = None
+
+
+def _credit_card_dpd() -> list:
+    return [IncrementalAggregation("FLAG_DPD", "credit_card_balance", lambda df: np.where(df["SK_DPD"] > 0, 1, 0), "sum", 12, _active)]
+
+
+def _pos_cash_dpd() -> list:
+    return [IncrementalAggregation("SK_DPD", "pos_cash_balance", "SK_DPD", "sum", 12, _active)]
+
+
+def _prev_dpd_flag(dpd_notation: list) -> list:
+    # Months are summed per SK_ID_CURR directly, which is the same as summing per SK_ID_BUREAU first.
+    return [IncrementalAggregation("DPD_STATUS", "bureau_balance", lambda df: np.where(df["STATUS"].isin(dpd_notation), 1, 0), "sum")]
+
+
+def _installments_version() -> list:
+    return [IncrementalAggregation("NUM_INSTALMENT_VERSION", "installments_payments", "NUM_INSTALMENT_VERSION", "mean",
+                                   where=lambda df: df["NUM_INSTALMENT_VERSION"] > 1)]
+
+
+# Features of custom_transformers.py which can be updated incrementally: feature name -> function which returns list of aggregations.
+FEATURES = {
+    "credit_card_dpd": _credit_card_dpd,
+    "pos_cash_dpd": _pos_cash_dpd,
+    "prev_dpd_flag": _prev_dpd_flag,
+    "installments_version": _installments_version,
+}
+
+
+def incremental_aggregations(features: list, feature_params: dict = None) -> list:
+    """Takes in list of feature names from FEATURES and returns list of their incremental aggregations.
+
+    Keyword arguments:
+    features -- list of feature names, for example ["credit_card_dpd", "prev_dpd_flag"].
+    feature_params -- dictionary with keyword arguments of features, for example {"prev_dpd_flag": {"dpd_notation": ["1", "2"]}}.
+    """
+
+    feature_params = feature_params or {}
+
+    return [aggregation for feature in features for aggregation in FEATURES[feature](**feature_params.get(feature, {}))]
+
+
+def _description(aggregations: list) -> str:
+    return json.dumps([[aggregation.name, aggregation.table, aggregation.reduction, aggregation.window] for aggregation in aggregations])
+
+
+class IncrementalAggregator:
+    """Mergeable per-client state of aggregations (sums, counts, maximums, numerators and denominators of means and
+    monthly buckets of windows) which is updated with new batches of rows instead of recomputing over full history.
+    Clients are stored in arrays whose capacity doubles when they are full, so update costs time proportional to the batch.
+
+    Windows are rings of monthly buckets ending with the reference month, 0 at first. Month of a row is MONTHS_BALANCE,
+    DAYS_INSTALMENT / 30 rounded up for installments_payments, so window of 12 months takes MONTHS_BALANCE > -12 as
+    credit_card_dpd does. When a new month starts, advance(1) moves the reference forward and empties the bucket
+    which leaves the window. Results are the same as a full recompute with months shifted back by the reference.
+
+    Keyword arguments:
+    aggregations -- list of IncrementalAggregation objects, for example incremental_aggregations(["credit_card_dpd"]).
+    capacity -- initial number of clients which fit into state arrays, at least 1.
+    """
+
+    def __init__(self, aggregations: list, capacity: int = 1024):
+        if capacity < 1:
+            raise ValueError(f"Capacity should be at least 1, got {capacity}.")
+
+        names = [aggregation.name for aggregation in aggregations]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Aggregations have duplicate names {sorted(name for name in set(names) if names.count(name) > 1)}.")
+
+        for aggregation in aggregations:
+            if aggregation.reduction not in INCREMENTAL_REDUCTIONS:
+                raise ValueError(f"Unknown incremental reduction {aggregation.reduction!r} of {aggregation.name}.")
+            if aggregation.window is not None and aggregation.table not in WINDOW_TIMES:
+                raise ValueError(f"Table {aggregation.table} of {aggregation.name} has no months, expected one of {tuple(WINDOW_TIMES)}.")
+
+        self.aggregations = aggregations
+        self.reference = 0
+        self.n_clients = 0
+        self._clients = np.zeros(capacity, dtype=np.int64)
+        self._slots = {}
+        self._state = {}
+        self._links = {}
+
+        for aggregation in aggregations:
+            shape = (capacity,) if aggregation.window is None else (capacity, aggregation.window)
+
+            if aggregation.reduction == "max":
+                self._state[f"{aggregation.name}:max"] = np.full(shape, np.nan)
+            else:
+                self._state[f"{aggregation.name}:sum"] = np.zeros(shape)
+                self._state[f"{aggregation.name}:count"] = np.zeros(shape)
+
+    @property
+    def capacity(self) -> int:
+        return len(self._clients)
+
+    def _grow(self, n_clients: int):
+        """Doubles capacity of state arrays until n_clients fit."""
+
+        capacity = self.capacity
+        while capacity < n_clients:
+            capacity *= 2
+
+        if capacity == self.capacity:
+            return
+
+        self._clients = np.concatenate([self._clients, np.zeros(capacity - self.capacity, dtype=np.int64)])
+
+        for key, array in self._state.items():
+            grown = np.full((capacity,) + array.shape[1:], np.nan if key.endswith(":max") else 0.0)
+            grown[:len(array)] = array
+            self._state[key] = grown
+
+    def get_indexer(self, client_ids: np.ndarray, create: bool = False) -> np.ndarray:
+        """Returns slots of SK_ID_CURR in state arrays, -1 for unknown clients unless create is True, then they get new slots.
+
+        Keyword arguments:
+        client_ids -- array of SK_ID_CURR.
+        create -- if True, unknown clients are appended to state arrays.
+        """
+
+        client_ids = np.asarray(client_ids, dtype=np.int64)
+        slots = np.fromiter((self._slots.get(client, -1) for client in client_ids.tolist()), dtype=np.int64, count=len(client_ids))
+
+        if not create or (slots >= 0).all():
+            return slots
+
+        # Only new clients are added to the dictionary, so its cost does not grow with number of known clients.
+        new_clients = pd.unique(client_ids[slots < 0])
+        new_slots = np.arange(self.n_clients, self.n_clients + len(new_clients))
+        self._grow(self.n_clients + len(new_clients))
+        self._clients[new_slots] = new_clients
+        self._slots.update(zip(new_clients.tolist(), new_slots.tolist()))
+        self.n_clients += len(new_clients)
+
+        missing = slots < 0
+        slots[missing] = [self._slots[client] for client in client_ids[missing].tolist()]
+
+        return slots
+
+    def _client_ids(self, table_name: str, batch: pd.DataFrame, link: pd.DataFrame = None) -> np.ndarray:
+        """Returns SK_ID_CURR of every row of the batch, NaN for rows of bureau_balance whose credit is not in bureau."""
+
+        if table_name not in LINKED_TABLES:
+            return batch["SK_ID_CURR"].to_numpy(dtype=np.float64)
+
+        key, link_name = LINKED_TABLES[table_name]
+        if link is None:
+            raise ValueError(f"Batch of {table_name} needs {link_name} table which maps {key} to SK_ID_CURR.")
+
+        # Index of the link table is built once and reused by following batches.
+        if self._links.get(link_name, (None,))[0] is not link:
+            self._links[link_name] = (link, pd.Index(link[key]), link["SK_ID_CURR"].to_numpy(dtype=np.float64))
+
+        _, link_index, link_clients = self._links[link_name]
+        positions = link_index.get_indexer(batch[key])
+
+        return np.where(positions >= 0, link_clients[positions], np.nan)
+
+    def update(self, table_name: str, batch: pd.DataFrame, link: pd.DataFrame = None) -> np.ndarray:
+        """Folds new rows of the table into the state and returns SK_ID_CURR of clients whose aggregates changed.
+
+        Keyword arguments:
+        table_name -- name of the table of the batch, for example "credit_card_balance".
+        batch -- new rows of the table.
+        link -- table which maps key of the batch to SK_ID_CURR, bureau for batches of bureau_balance.
+        """
+
+        aggregations = [aggregation for aggregation in self.aggregations if aggregation.table == table_name]
+        if not aggregations or not len(batch):
+            return np.array([], dtype=np.int64)
+
+        client_ids = self._client_ids(table_name, batch, link)
+        known = ~np.isnan(client_ids)
+        slots = np.full(len(batch), -1)
+        slots[known] = self.get_indexer(client_ids[known].astype(np.int64), create=True)
+
+        months = None
+        if any(aggregation.window is not None for aggregation in aggregations):
+            months = np.ceil(np.asarray(WINDOW_TIMES[table_name](batch), dtype=np.float64))
+            if (months > self.reference).any():
+                raise ValueError(f"Batch of {table_name} has months after the reference month {self.reference}, advance the state first.")
+
+        for aggregation in aggregations:
+            column = aggregation.column(batch) if callable(aggregation.column) else batch[aggregation.column]
+            values = np.asarray(column, dtype=np.float64)
+            valid = known & ~np.isnan(values)
+
+            if aggregation.where is not None:
+                valid &= np.asarray(aggregation.where(batch), dtype=bool)
+
+            if aggregation.window is not None:
+                valid &= months > self.reference - aggregation.window
+                index = (slots[valid], np.mod(months[valid], aggregation.window).astype(np.int64))
+            else:
+                index = slots[valid]
+
+            if aggregation.reduction == "max":
+                np.fmax.at(self._state[f"{aggregation.name}:max"], index, values[valid])
+            else:
+                np.add.at(self._state[f"{aggregation.name}:sum"], index, values[valid])
+                np.add.at(self._state[f"{aggregation.name}:count"], index, 1)
+
+        return pd.unique(client_ids[known]).astype(np.int64)
+
+    def advance(self, months: int = 1):
+        """Moves the reference month forward and empties buckets of months which leave windows."""
+
+        for aggregation in self.aggregations:
+            if aggregation.window is None:
+                continue
+
+            leaving = [np.mod(month, aggregation.window) for month in
+                       range(self.reference - aggregation.window + 1, self.reference - aggregation.window + 1 + min(months, aggregation.window))]
+
+            for key in (f"{aggregation.name}:max",) if aggregation.reduction == "max" else (f"{aggregation.name}:sum", f"{aggregation.name}:count"):
+                self._state[key][:, leaving] = np.nan if aggregation.reduction == "max" else 0.0
+
+        self.reference += months
+
+    def merge(self, other: "IncrementalAggregator") -> "IncrementalAggregator":
+        """Adds state of other aggregator with the same aggregations and reference month, e.g. built from another
+        part of the history, and returns self.
+        """
+
+        if _description(other.aggregations) != _description(self.aggregations) or other.reference != self.reference:
+            raise ValueError("Only states with the same aggregations and reference month can be merged.")
+
+        slots = self.get_indexer(other._clients[:other.n_clients], create=True)
+
+        for key, array in other._state.items():
+            if key.endswith(":max"):
+                self._state[key][slots] = np.fmax(self._state[key][slots], array[:other.n_clients])
+            else:
+                self._state[key][slots] += array[:other.n_clients]
+
+        return self
+
+    def result(self, client_ids: np.ndarray = None) -> pd.DataFrame:
+        """Returns dataframe with aggregated features indexed by SK_ID_CURR, the same as aggregated tables of
+        custom_transformers.py, which can be joined by _join_aggregate.
+
+        Keyword arguments:
+        client_ids -- SK_ID_CURR to return, e.g. the ones returned by update. All clients if None.
+        """
+
+        if client_ids is None:
+            slots = np.arange(self.n_clients)
+        else:
+            slots = self.get_indexer(client_ids)
+            slots = slots[slots >= 0]
+
+        columns = {}
+
+        for aggregation in self.aggregations:
+            if aggregation.reduction == "max":
+                maximum = self._state[f"{aggregation.name}:max"][slots]
+                columns[aggregation.name] = maximum if aggregation.window is None else np.fmax.reduce(maximum, axis=1)
+                continue
+
+            total = self._state[f"{aggregation.name}:sum"][slots]
+            count = self._state[f"{aggregation.name}:count"][slots]
+
+            if aggregation.window is not None:
+                total, count = total.sum(axis=1), count.sum(axis=1)
+
+            if aggregation.reduction == "sum":
+                columns[aggregation.name] = total
+            elif aggregation.reduction == "count":
+                columns[aggregation.name] = count
+            else:
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    columns[aggregation.name] = np.where(count > 0, total / count, np.nan)
+
+        return pd.DataFrame(columns, index=pd.Index(self._clients[slots], name="SK_ID_CURR"))
+
+    def save(self, path: str):
+        """Saves state arrays, clients and reference month as .npz file."""
+
+        arrays = {key: array[:self.n_clients] for key, array in self._state.items()}
+        arrays.update({"clients": self._clients[:self.n_clients], "reference": np.array(self.reference),
+                       "aggregations": np.array(_description(self.aggregations))})
+
+        # File is written under temporary name first, so interrupted save never leaves a broken state.
+        with open(path + ".tmp", "wb") as state_file:
+            np.savez(state_file, **arrays)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str, aggregations: list) -> "IncrementalAggregator":
+        """Takes in path of saved state and the same aggregations which it was saved with and returns IncrementalAggregator."""
+
+        with np.load(path) as saved:
+            if str(saved["aggregations"]) != _description(aggregations):
+                raise ValueError(f"State in {path} was saved with different aggregations.")
+
+            clients = saved["clients"]
+            aggregator = cls(aggregations, capacity=max(1, len(clients)))
+            aggregator.reference = int(saved["reference"])
+            aggregator.get_indexer(clients, create=True)
+
+            for key in aggregator._state:
+                aggregator._state[key][:len(clients)] = saved[key]
+
+        return aggregator
\ No newline at end of file
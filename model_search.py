@@ -0,0 +1,228 @@
+import copy
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler, StratifiedKFold
+from sklearn.preprocessing import FunctionTransformer
+
+from custom_transformers import SideTableTransformer
+from data_loader import CACHE_DIR
+from feature_store import _code_fingerprint
+from functions import fit_transform_steps, transform_steps
+
+FOLD_CACHE_DIR = os.path.join(CACHE_DIR, "folds")
+
+
+def preprocessing_key(preprocessing: list, X: pd.DataFrame, y: pd.Series, splits: list, random_state: int = None) -> str:
+    """Returns key of transformed folds: hash of preprocessing steps with their parameters and side tables,
+    source code of feature functions, training data and fold indexes.
+    """
+
+    # Functions are pickled by name, so their source code is hashed separately.
+    code = [_code_fingerprint(step.func) for _, step in preprocessing if isinstance(step, FunctionTransformer)]
+
+    return joblib.hash((preprocessing, code, X, y, splits, random_state))
+
+
+def cache_folds(preprocessing: list, X: pd.DataFrame, y: pd.Series, splits: list, cache_dir: str = FOLD_CACHE_DIR,
+                random_state: int = None) -> list:
+    """Takes in steps of a pipeline before the model and returns paths of joblib files with (X_train, y_train,
+    X_valid, y_valid) of every fold. Steps are fitted on the training part of each fold only once, later calls with
+    the same steps and data read the files. Training rows are shuffled once, so their first n rows are a random subsample.
+
+    Keyword arguments:
+    preprocessing -- list of (name, transformer) steps, for example lgbm_pipe.steps[:-1]. Samplers resample training parts only.
+    X, y -- training features and target.
+    splits -- list of (train, valid) index arrays.
+    cache_dir -- directory of cached folds.
+    random_state -- seed of the shuffle of training rows.
+    """
+
+    directory = os.path.join(cache_dir, preprocessing_key(preprocessing, X, y, splits, random_state))
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(random_state)
+    paths = []
+
+    for i, (train, valid) in enumerate(splits):
+        path = os.path.join(directory, f"fold_{i}.joblib")
+        paths.append(path)
+
+        if os.path.exists(path):
+            continue
+
+        steps = [(name, _fold_step(step)) for name, step in preprocessing]
+        X_train, y_train = fit_transform_steps(steps, X.iloc[train], y.iloc[train])
+        X_valid = transform_steps(steps, X.iloc[valid])
+
+        X_train, X_valid = (matrix.to_numpy() if isinstance(matrix, pd.DataFrame) else matrix for matrix in (X_train, X_valid))
+        order = rng.permutation(X_train.shape[0])
+
+        # Files are written under temporary names first, so interrupted run never leaves a half-written fold.
+        joblib.dump((X_train[order], np.asarray(y_train)[order], X_valid, np.asarray(y.iloc[valid])), path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    return paths
+
+
+def _fold_step(step):
+    """Returns copy of preprocessing step which is fitted on one fold. Cloning would deep-copy side tables, so
+    FunctionTransformer steps, which are stateless, are reused and SideTableTransformer steps, whose aggregate_
+    depends only on their side table, are copied shallowly and share it with the original step.
+    """
+
+    if step is None or step == "passthrough" or isinstance(step, FunctionTransformer):
+        return step
+
+    if isinstance(step, SideTableTransformer):
+        return copy.copy(step)
+
+    return clone(step)
+
+
+def _eval_rows(n_rows: int, early_stopping_fraction: float) -> int:
+    """Returns number of last training rows which are held out for early stopping."""
+
+    return max(1, int(np.ceil(n_rows * early_stopping_fraction)))
+
+
+def _fit_estimator(estimator, X_train, y_train, X_eval, y_eval, early_stopping_rounds: int = None):
+    """Fits estimator and returns its best iteration if it is a boosted model fitted with early stopping on X_eval, y_eval,
+    which are held out of the training part, so that the validation fold stays unseen until it is scored.
+    """
+
+    if early_stopping_rounds is None:
+        estimator.fit(X_train, y_train)
+        return None
+
+    module = type(estimator).__module__
+
+    if module.startswith("lightgbm"):
+        import lightgbm
+
+        estimator.fit(X_train, y_train, eval_set=[(X_eval, y_eval)], callbacks=[lightgbm.early_stopping(early_stopping_rounds, verbose=False)])
+        return estimator.best_iteration_
+
+    if module.startswith("xgboost"):
+        estimator.set_params(early_stopping_rounds=early_stopping_rounds)
+        estimator.fit(X_train, y_train, eval_set=[(X_eval, y_eval)], verbose=False)
+        return estimator.best_iteration
+
+    estimator.fit(X_train, y_train)
+    return None
+
+
+def _evaluate_candidate(model, params: dict, fold_paths: list, resource: str, n_resources: int,
+                        early_stopping_rounds: int = None, early_stopping_fraction: float = 0.1) -> dict:
+    """Fits candidate on every cached fold and returns its validation ROC AUC and fit time. Runs in a joblib worker,
+    folds are memory-mapped, so workers share one copy of the matrices in page cache instead of pickled copies.
+    With early stopping the last rows of shuffled training part are held out as its evaluation set.
+    """
+
+    start = time.perf_counter()
+    scores, best_iterations = [], []
+
+    for path in fold_paths:
+        X_train, y_train, X_valid, y_valid = joblib.load(path, mmap_mode="r")
+        estimator = clone(model).set_params(**params)
+        X_eval = y_eval = None
+
+        if early_stopping_rounds is not None:
+            n_train = X_train.shape[0] - _eval_rows(X_train.shape[0], early_stopping_fraction)
+            X_train, y_train, X_eval, y_eval = X_train[:n_train], y_train[:n_train], X_train[n_train:], y_train[n_train:]
+
+        if resource == "n_samples":
+            X_train, y_train = X_train[:n_resources], y_train[:n_resources]
+        else:
+            estimator.set_params(**{resource: n_resources})
+
+        best_iterations.append(_fit_estimator(estimator, X_train, y_train, X_eval, y_eval, early_stopping_rounds))
+        scores.append(roc_auc_score(y_valid, estimator.predict_proba(X_valid)[:, 1]))
+
+    return {"Mean AUC": np.mean(scores),
+            "Std AUC": np.std(scores),
+            "Best iteration": None if best_iterations[0] is None else int(np.mean(best_iterations)),
+            "Fit time, s": time.perf_counter() - start}
+
+
+def _halving_resources(n_candidates: int, max_resources: int, min_resources: int, factor: int) -> list:
+    """Returns resources of every iteration of successive halving, which ends with the last candidates at max_resources."""
+
+    n_iterations = 1
+    while factor ** n_iterations <= n_candidates:
+        n_iterations += 1
+
+    if min_resources is None:
+        return [max(1, int(max_resources / factor ** (n_iterations - 1 - i))) for i in range(n_iterations)]
+
+    return [min(max_resources, min_resources * factor ** i) for i in range(n_iterations)]
+
+
+def model_search(preprocessing: list, model, param_grid, X: pd.DataFrame, y: pd.Series, cv=3, n_candidates: int = None,
+                 resource: str = "n_samples", min_resources: int = None, factor: int = 3, early_stopping_rounds: int = None,
+                 early_stopping_fraction: float = 0.1, n_jobs: int = None, random_state: int = None,
+                 cache_dir: str = FOLD_CACHE_DIR) -> pd.DataFrame:
+    """Takes in steps of a pipeline before the model, model and parameter grid and returns table with validation
+    ROC AUC and fit time of every candidate at every iteration of successive halving, the best candidate first.
+    Preprocessing is fitted once per fold and cached (see cache_folds), only the model is fitted for every candidate.
+    Candidates of an iteration run in parallel processes and the best 1/factor of them go on with factor times more resources.
+
+    Keyword arguments:
+    preprocessing -- list of (name, transformer) steps before the model, for example lgbm_pipe.steps[:-1].
+    model -- estimator to tune, for example lgbm.
+    param_grid -- dictionary or list of dictionaries with parameter values, as in HalvingGridSearchCV.
+    X, y -- training features and target.
+    cv -- number of stratified folds or sklearn splitter, e.g. StratifiedShuffleSplit.
+    n_candidates -- number of randomly sampled candidates, all combinations of param_grid if None.
+    resource -- "n_samples" (number of training rows) or parameter of the model, e.g. "n_estimators".
+    min_resources -- resources of the first iteration, chosen so that the last iteration uses all resources if None.
+    factor -- proportion of candidates dropped and growth of resources between iterations. factor larger than number
+    of candidates means no halving, every candidate is fitted with all resources once.
+    early_stopping_rounds -- if set, LGBMClassifier and XGBClassifier stop after that many rounds without improvement
+    on rows held out of the training part, the validation fold is used only for scoring.
+    early_stopping_fraction -- share of training rows held out for early stopping.
+    n_jobs -- number of parallel processes, all CPUs if None.
+    random_state -- seed of folds, sampled candidates and subsamples.
+    cache_dir -- directory of cached folds.
+    """
+
+    if isinstance(cv, int):
+        cv = StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state)
+
+    splits = list(cv.split(X, y))
+    fold_paths = cache_folds(preprocessing, X, y, splits, cache_dir, random_state)
+
+    if n_candidates is None:
+        candidates = list(ParameterGrid(param_grid))
+    else:
+        candidates = list(ParameterSampler(param_grid, n_candidates, random_state=random_state))
+
+    if resource == "n_samples":
+        # Samplers change number of training rows, so it is taken from cached folds.
+        max_resources = min(joblib.load(path, mmap_mode="r")[0].shape[0] for path in fold_paths)
+        if early_stopping_rounds is not None:
+            max_resources -= _eval_rows(max_resources, early_stopping_fraction)
+    else:
+        max_resources = model.get_params()[resource]
+
+    results = []
+
+    for iteration, n_resources in enumerate(_halving_resources(len(candidates), max_resources, min_resources, factor)):
+        evaluations = Parallel(n_jobs=n_jobs or -1)(
+            delayed(_evaluate_candidate)(model, params, fold_paths, resource, n_resources, early_stopping_rounds, early_stopping_fraction)
+            for params in candidates)
+
+        for params, evaluation in zip(candidates, evaluations):
+            results.append({"Iteration": iteration, "Resources": n_resources, "Params": params, **evaluation})
+
+        order = np.argsort([-evaluation["Mean AUC"] for evaluation in evaluations], kind="stable")
+        candidates = [candidates[i] for i in order[:max(1, int(np.ceil(len(candidates) / factor)))]]
+
+    return (pd.DataFrame(results)
+            .sort_values(by=["Iteration", "Mean AUC"], ascending=False)
+            .reset_index(drop=True))
\ No newline at end of file
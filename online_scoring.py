@@ -0,0 +1,243 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import FunctionTransformer
+
+from streaming import is_path
+
+# Keyword arguments of feature functions in custom_transformers.py which hold side tables: argument name -> key column of the table.
+SIDE_TABLE_ARGUMENTS = {
+    "credit_card_df": "SK_ID_CURR",
+    "pos_cash_df": "SK_ID_CURR",
+    "bureau_df": "SK_ID_CURR",
+    "previous_application_df": "SK_ID_CURR",
+    "installments_payments_df": "SK_ID_CURR",
+    "bureau_balance_df": "SK_ID_BUREAU",
+}
+
+# Prefixes of count columns of bureau_credit_type_counter and prev_credit_type_counter.
+COUNT_COLUMN_PREFIXES = ("BUREAU_CREDIT_", "PREV_APP_")
+
+
+class SideTableIndex:
+    """Side table sorted by key column once, with offsets of the first row of every key (CSR-style index).
+    Rows of one key are a contiguous slice which is found by binary search, so lookup does not scan the table.
+
+    Keyword arguments:
+    table -- additional dataframe, for example bureau or previous_application.
+    key -- column by which rows are looked up, SK_ID_CURR or SK_ID_BUREAU.
+    """
+
+    def __init__(self, table: pd.DataFrame, key: str = "SK_ID_CURR"):
+        if not table[key].is_monotonic_increasing:
+            table = table.iloc[np.argsort(table[key].to_numpy(), kind="stable")]
+
+        self.table = table.reset_index(drop=True)
+        self.key = key
+        self.keys, offsets = np.unique(self.table[key].to_numpy(), return_index=True)
+        self.offsets = np.append(offsets, len(self.table))
+
+    def rows(self, key_values) -> pd.DataFrame:
+        """Takes in key values and returns all rows of the table with those keys."""
+
+        key_values = np.unique(np.asarray(key_values))
+        positions = np.searchsorted(self.keys, key_values)
+        positions = positions[(positions < len(self.keys)) & (self.keys[np.minimum(positions, len(self.keys) - 1)] == key_values)]
+
+        if not len(positions):
+            return self.table.iloc[:0]
+
+        rows = np.concatenate([np.arange(self.offsets[position], self.offsets[position + 1]) for position in positions])
+
+        return self.table.iloc[rows]
+
+
+class OnlineScorer:
+    """Scores single applicants (or small batches) with a fitted pipeline, for example lgbm_pipe or log_pipe,
+    without scanning whole side tables. Side tables passed to FunctionTransformer steps through kw_args are indexed
+    once by SideTableIndex and every feature function gets only the rows of scored applicants. Stateful transformers
+    run as usual, samplers (steps with fit_resample) are skipped as they are in Pipeline.predict_proba.
+
+    Keyword arguments:
+    pipeline -- fitted sklearn or imblearn pipeline which ends with a classifier.
+    dtypes -- dtypes of application table columns, for example application_test.dtypes. Used to cast rows which come as JSON.
+    indexes -- dictionary of SideTableIndex objects by id of side table which is shared with other scorers, new one if None.
+    """
+
+    def __init__(self, pipeline, dtypes: pd.Series = None, indexes: dict = None):
+        self.pipeline = pipeline
+        self.dtypes = dtypes
+        self._indexes = {} if indexes is None else indexes
+
+        for _, transformer in self.pipeline.steps[:-1]:
+            for name, table in self._side_tables(transformer).items():
+                if is_path(table):
+                    raise ValueError(f"Side table {name} is a path to CSV file, online scoring needs it loaded into memory.")
+
+                if id(table) not in self._indexes:
+                    self._indexes[id(table)] = SideTableIndex(table, SIDE_TABLE_ARGUMENTS[name])
+
+    @staticmethod
+    def _side_tables(transformer) -> dict:
+        if not isinstance(transformer, FunctionTransformer):
+            return {}
+
+        return {name: value for name, value in (transformer.kw_args or {}).items() if name in SIDE_TABLE_ARGUMENTS}
+
+    def _applicant_kw_args(self, transformer: FunctionTransformer, client_ids: np.ndarray) -> dict:
+        """Returns kw_args of the step with side tables replaced by rows of the applicants."""
+
+        kw_args = dict(transformer.kw_args or {})
+        side_tables = self._side_tables(transformer)
+
+        for name, table in side_tables.items():
+            if SIDE_TABLE_ARGUMENTS[name] == "SK_ID_CURR":
+                kw_args[name] = self._indexes[id(table)].rows(client_ids)
+
+        # bureau_balance is keyed by SK_ID_BUREAU, so it is looked up by credits of the applicants in bureau.
+        for name, table in side_tables.items():
+            if SIDE_TABLE_ARGUMENTS[name] == "SK_ID_BUREAU":
+                kw_args[name] = self._indexes[id(table)].rows(kw_args["bureau_df"]["SK_ID_BUREAU"])
+
+        return kw_args
+
+    def _side_table_feature(self, transformer: FunctionTransformer, X: pd.DataFrame, client_ids: np.ndarray) -> pd.DataFrame:
+        return transformer.func(X, **self._applicant_kw_args(transformer, client_ids))
+
+    def _applicant_frame(self, applicant) -> pd.DataFrame:
+        if isinstance(applicant, pd.DataFrame):
+            return applicant
+
+        frame = pd.DataFrame([applicant]) if isinstance(applicant, (dict, pd.Series)) else pd.DataFrame(applicant)
+
+        if self.dtypes is not None:
+            frame = frame.astype({column: dtype for column, dtype in self.dtypes.items() if column in frame.columns})
+
+        return frame
+
+    @staticmethod
+    def _checks_feature_names(transformer) -> bool:
+        """Returns True if transformer checks columns of X against feature_names_in_ in transform. FunctionTransformer
+        without validate does not, and the same object is often shared by pipelines (e.g. get_drop_id), so its
+        feature_names_in_ are of the pipeline which was fitted last.
+        """
+
+        if isinstance(transformer, FunctionTransformer) and not transformer.validate:
+            return False
+
+        return hasattr(transformer, "feature_names_in_")
+
+    @staticmethod
+    def _count_columns_filled(X: pd.DataFrame, feature_names: np.ndarray) -> pd.DataFrame:
+        """Returns X with columns in the order of feature_names. Count columns (e.g. BUREAU_CREDIT_*) exist only for values
+        which applicants have, so the missing ones are zero as in full join. Any other missing column is an error.
+        """
+
+        missing = [column for column in feature_names if column not in X.columns]
+        required = [column for column in missing if not column.startswith(COUNT_COLUMN_PREFIXES)]
+
+        if required:
+            raise ValueError(f"Applicant data has no columns {required}.")
+
+        return X.reindex(columns=feature_names, fill_value=0)
+
+    def transform(self, applicant) -> np.ndarray:
+        """Takes in application row(s) as dataframe, dictionary or list of dictionaries and returns features
+        which are passed to the model of the pipeline.
+        """
+
+        X = self._applicant_frame(applicant)
+        client_ids = X["SK_ID_CURR"].to_numpy()
+
+        for _, transformer in self.pipeline.steps[:-1]:
+            if transformer is None or transformer == "passthrough" or hasattr(transformer, "fit_resample"):
+                continue
+
+            if self._side_tables(transformer):
+                X = self._side_table_feature(transformer, X, client_ids)
+                continue
+
+            if isinstance(X, pd.DataFrame) and self._checks_feature_names(transformer):
+                X = self._count_columns_filled(X, transformer.feature_names_in_)
+
+            X = transformer.transform(X)
+
+        return X
+
+    def predict_proba(self, applicant) -> np.ndarray:
+        """Takes in application row(s) and returns probabilities of TARGET = 1."""
+
+        return self.pipeline.steps[-1][1].predict_proba(self.transform(applicant))[:, 1]
+
+    def score(self, applicant) -> float:
+        """Takes in one application row and returns probability of TARGET = 1."""
+
+        return float(self.predict_proba(applicant)[0])
+
+
+def _handler(scorer: OnlineScorer):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                applicants = payload if isinstance(payload, list) else [payload]
+                if not all(isinstance(applicant, dict) for applicant in applicants):
+                    raise ValueError("Request should be JSON object or list of objects.")
+
+                body = {"SK_ID_CURR": [applicant.get("SK_ID_CURR") for applicant in applicants],
+                        "TARGET": scorer.predict_proba(applicants).tolist()}
+                status = 200
+            # Bad JSON, missing columns and values which cannot be cast are errors of the client, anything else of the server.
+            except (json.JSONDecodeError, KeyError, ValueError) as error:
+                body, status = {"error": str(error)}, 400
+            except Exception as error:
+                body, status = {"error": str(error)}, 500
+
+            response = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ScoringHandler
+
+
+def make_server(scorer: OnlineScorer, host: str = "127.0.0.1", port: int = 8000) -> ThreadingHTTPServer:
+    """Returns local HTTP server which answers POST requests with JSON application row (or list of rows)
+    with JSON {"SK_ID_CURR": [...], "TARGET": [...]}. Stand-in for a scoring service, start it with serve_forever().
+    """
+
+    return ThreadingHTTPServer((host, port), _handler(scorer))
+
+
+def benchmark_latency(scorer: OnlineScorer, applications: pd.DataFrame, n_requests: int = 1000, random_state: int = None) -> dict:
+    """Takes in scorer and dataframe with application rows and returns latency of scoring one applicant
+    per call in milliseconds.
+
+    Keyword arguments:
+    scorer -- OnlineScorer with fitted pipeline.
+    applications -- dataframe with application rows, for example application_test.
+    n_requests -- number of single-applicant calls.
+    random_state -- seed of random choice of applicants.
+    """
+
+    rows = np.random.default_rng(random_state).integers(0, len(applications), n_requests)
+    latencies = np.empty(n_requests)
+
+    for i, row in enumerate(rows):
+        start = time.perf_counter()
+        scorer.score(applications.iloc[[row]])
+        latencies[i] = (time.perf_counter() - start) * 1000
+
+    return {"requests": n_requests,
+            "p50, ms": float(np.percentile(latencies, 50)),
+            "p99, ms": float(np.percentile(latencies, 99)),
+            "mean, ms": float(latencies.mean()),
+            "max, ms": float(latencies.max())}
\ No newline at end of file
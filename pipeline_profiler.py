@@ -0,0 +1,213 @@
+import copy
+import json
+import os
+import time
+import tracemalloc
+
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+
+def _shape(X) -> tuple:
+    """Returns number of rows and columns of dataframe, array, sparse matrix or series."""
+
+    shape = getattr(X, "shape", None)
+
+    if shape is None:
+        return (len(X), None) if hasattr(X, "__len__") else (None, None)
+
+    return shape[0], (shape[1] if len(shape) > 1 else 1)
+
+
+class PipelineProfile:
+    """Records of calls of profiled pipeline steps: wall and CPU time, memory and shapes of input and output.
+
+    Keyword arguments:
+    enabled -- if False, profiled steps call wrapped steps directly and nothing is recorded.
+    trace_memory -- if True, peak memory and allocated bytes are measured with tracemalloc, which slows Python code down.
+    """
+
+    def __init__(self, enabled: bool = True, trace_memory: bool = True):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.records = []
+        self._origin = time.perf_counter()
+
+    def call(self, step: str, method: str, function, X, *args, resamples: bool = False, **kwargs):
+        """Calls function(X, *args, **kwargs) of the step and records its costs. Returns result of the function."""
+
+        if not self.enabled:
+            return function(X, *args, **kwargs)
+
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            memory_before, _ = tracemalloc.get_traced_memory()
+
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        result = function(X, *args, **kwargs)
+        wall_end, cpu_end = time.perf_counter(), time.process_time()
+
+        memory_after = peak = None
+        if self.trace_memory:
+            memory_after, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+
+        # Samplers return (X, y), the other steps return transformed X or the fitted step itself.
+        output = result[0] if resamples else result
+        rows_in, columns_in = _shape(X)
+        rows_out, columns_out = _shape(output) if method in ("transform", "fit_transform", "fit_resample") else (None, None)
+
+        self.records.append({
+            "Step": step,
+            "Method": method,
+            "Start, s": wall_start - self._origin,
+            "Wall time, s": wall_end - wall_start,
+            "CPU time, s": cpu_end - cpu_start,
+            "Peak memory delta, MB": (peak - memory_before) / 1024 ** 2 if self.trace_memory else None,
+            "Allocated, MB": (memory_after - memory_before) / 1024 ** 2 if self.trace_memory else None,
+            "Rows in": rows_in,
+            "Columns in": columns_in,
+            "Rows out": rows_out,
+            "Columns out": columns_out,
+            # Resampling changes rows by design, other steps (e.g. joins with fillna(0)) should keep them.
+            "Rows changed": rows_out is not None and rows_out != rows_in and not resamples,
+        })
+
+        return result
+
+    def to_frame(self) -> pd.DataFrame:
+        """Returns records as dataframe, one row per call of a profiled step."""
+
+        return pd.DataFrame(self.records)
+
+    def summary(self) -> pd.DataFrame:
+        """Returns total wall time, CPU time and peak memory delta of every step and method, the slowest first."""
+
+        return (self.to_frame()
+                .groupby(["Step", "Method"], sort=False)
+                .agg({"Wall time, s": "sum", "CPU time, s": "sum", "Peak memory delta, MB": "max", "Rows changed": "any"})
+                .sort_values(by="Wall time, s", ascending=False)
+                .reset_index())
+
+    def to_json(self, path: str):
+        """Saves records as JSON list."""
+
+        with open(path, "w") as json_file:
+            json.dump(self.records, json_file, indent=1, default=float)
+
+    def to_trace(self, path: str):
+        """Saves records in Chrome trace event format, which chrome://tracing, Perfetto or speedscope show as a flame chart."""
+
+        events = [{"name": f"{record['Step']}.{record['Method']}", "cat": record["Method"], "ph": "X", "pid": os.getpid(), "tid": 0,
+                   "ts": record["Start, s"] * 1e6, "dur": record["Wall time, s"] * 1e6,
+                   "args": {key: value for key, value in record.items() if key not in ("Step", "Method", "Start, s")}}
+                  for record in self.records]
+
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file, default=float)
+
+    def clear(self):
+        self.records = []
+        self._origin = time.perf_counter()
+
+
+class _ProfiledBase(BaseEstimator):
+    def __init__(self, estimator, profile: PipelineProfile, name: str = None):
+        self.estimator = estimator
+        self.profile = profile
+        self.name = name
+
+    def __getattr__(self, attribute):
+        # Fitted attributes of wrapped step, e.g. transformers_ of ColumnTransformer, are read through the wrapper.
+        if attribute in ("estimator", "profile", "name") or attribute.startswith("__"):
+            raise AttributeError(attribute)
+
+        return getattr(self.estimator, attribute)
+
+    def _call(self, method: str, X, *args, **kwargs):
+        return self.profile.call(self.name or type(self.estimator).__name__, method, getattr(self.estimator, method), X, *args, **kwargs)
+
+
+class ProfiledTransformer(_ProfiledBase, TransformerMixin):
+    """Wrapper of pipeline transformer (FunctionTransformer, ColumnTransformer, StandardScaler, ...) which records its calls in profile."""
+
+    def fit(self, X, y=None, **fit_params):
+        self._call("fit", X, y, **fit_params)
+
+        return self
+
+    def fit_transform(self, X, y=None, **fit_params):
+        return self._call("fit_transform", X, y, **fit_params)
+
+    def transform(self, X):
+        return self._call("transform", X)
+
+
+class ProfiledSampler(_ProfiledBase):
+    """Wrapper of imblearn sampler (SMOTE, RandomUnderSampler, ...) which records its calls in profile.
+    Samplers change number of rows by design, so they are never flagged for it.
+    """
+
+    def fit(self, X, y):
+        self._call("fit", X, y)
+
+        return self
+
+    def fit_resample(self, X, y):
+        return self._call("fit_resample", X, y, resamples=True)
+
+
+class ProfiledEstimator(_ProfiledBase):
+    """Wrapper of the final model of a pipeline which records fit and predictions in profile."""
+
+    def fit(self, X, y=None, **fit_params):
+        self._call("fit", X, y, **fit_params)
+
+        return self
+
+    def predict(self, X):
+        return self._call("predict", X)
+
+    def predict_proba(self, X):
+        return self._call("predict_proba", X)
+
+
+def _profiled_step(name: str, step, profile: PipelineProfile, final: bool):
+    if step is None or step == "passthrough":
+        return step
+
+    if hasattr(step, "fit_resample"):
+        return ProfiledSampler(step, profile, name)
+
+    if final and not hasattr(step, "transform"):
+        return ProfiledEstimator(step, profile, name)
+
+    return ProfiledTransformer(step, profile, name)
+
+
+def profile_pipeline(pipeline, profile: PipelineProfile = None, enabled: bool = True) -> tuple:
+    """Takes in sklearn or imblearn pipeline, for example lgbm_pipe, and returns its copy with every step wrapped
+    in a profiling wrapper and PipelineProfile with records of the steps. Wrapped steps are the same objects,
+    so fitting the copy fits the steps of the original pipeline.
+
+    Keyword arguments:
+    pipeline -- pipeline from the notebook.
+    profile -- PipelineProfile to record into, new one if None.
+    enabled -- if False, pipeline is returned as it is, so profiling costs nothing.
+    """
+
+    profile = profile or PipelineProfile()
+
+    if not enabled:
+        return pipeline, profile
+
+    profiled = copy.copy(pipeline)
+    last = len(pipeline.steps) - 1
+    profiled.steps = [(name, _profiled_step(name, step, profile, i == last)) for i, (name, step) in enumerate(pipeline.steps)]
+
+    return profiled, profile
\ No newline at end of file
@@ -0,0 +1,59 @@
+import os
+from typing import Callable, Iterable, Iterator, Union
+
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 1_000_000
+
+
+def is_path(source) -> bool:
+    """Returns True if source of the table is a path to CSV file rather than dataframe."""
+
+    return isinstance(source, (str, os.PathLike))
+
+
+def read_chunks(source: Union[pd.DataFrame, str], columns: list, chunksize: int = DEFAULT_CHUNKSIZE, dtype: dict = None) -> Iterator[pd.DataFrame]:
+    """Yields chunks of at most chunksize rows with specified columns of the table.
+
+    Keyword arguments:
+    source -- dataframe or path to CSV file. CSV file is read chunk by chunk, so it is never loaded whole.
+    columns -- list of columns to read.
+    chunksize -- number of rows in one chunk.
+    dtype -- dtypes of CSV columns. Chunks are parsed separately, so columns whose type could differ between chunks should be set.
+    """
+
+    if is_path(source):
+        yield from pd.read_csv(source, usecols=columns, dtype=dtype, chunksize=chunksize)
+    else:
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start:start + chunksize][columns]
+
+
+def chunked_reduce(chunks: Iterable[pd.DataFrame], reduce_chunk: Callable[[pd.DataFrame], pd.DataFrame]) -> pd.DataFrame:
+    """Takes in chunks of the table and function which reduces one chunk to partial sums per key
+    and returns sums per key over all chunks. Partial sums are added up as soon as they are calculated,
+    so memory depends on chunk size and number of keys, not on the size of the table.
+
+    Keyword arguments:
+    chunks -- iterable of dataframes, for example from read_chunks.
+    reduce_chunk -- function which takes in chunk and returns dataframe with sums indexed by key, e.g. SK_ID_CURR.
+    """
+
+    total = None
+    dtypes = None
+
+    for chunk in chunks:
+        partial = reduce_chunk(chunk)
+
+        if total is None:
+            total, dtypes = partial, partial.dtypes
+        else:
+            total = total.add(partial, fill_value=0)
+
+    if total is None:
+        raise ValueError("Table has no rows to reduce.")
+
+    # Adding partial sums with fill_value turns integer sums into floats.
+    integer_columns = [column for column, dtype in dtypes.items() if pd.api.types.is_integer_dtype(dtype)]
+
+    return total.astype({column: "int64" for column in integer_columns})
\ No newline at end of file
@@ -0,0 +1,281 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_loader import TABLES
+
+# Number of rows of the Kaggle tables, synthetic tables have about scale times as many rows.
+KAGGLE_ROWS = {
+    "application_train": 307_511,
+    "application_test": 48_744,
+    "bureau": 1_716_428,
+    "bureau_balance": 27_299_925,
+    "pos_cash_balance": 10_001_358,
+    "credit_card_balance": 3_840_312,
+    "previous_application": 1_670_214,
+    "installments_payments": 13_605_401,
+}
+
+ORGANIZATION_TYPES = ["Business Entity Type 3", "XNA", "Self-employed", "Other", "Medicine", "Business Entity Type 2",
+                      "Government", "School", "Trade: type 7", "Kindergarten", "Construction", "Business Entity Type 1",
+                      "Transport: type 4", "Trade: type 3", "Industry: type 9", "Industry: type 3", "Security", "Housing",
+                      "Industry: type 11", "Military", "Bank", "Agriculture", "Police", "Transport: type 2", "Postal"]
+
+CREDIT_TYPES = ["Consumer credit", "Credit card", "Car loan", "Mortgage", "Microloan", "Loan for business development",
+                "Another type of loan", "Unknown type of loan", "Loan for working capital replenishment", "Cash loan (non-earmarked)",
+                "Real estate loan", "Loan for the purchase of equipment", "Loan for purchase of shares (margin lending)",
+                "Mobile operator loan", "Interbank credit"]
+CREDIT_TYPE_SHARES = [0.729, 0.236, 0.016, 0.011, 0.0072, 0.0012, 0.00059, 0.00032, 0.00027, 0.00008,
+                      0.00016, 0.00001, 0.000002, 0.000001, 0.000001]
+
+ENQUIRIES = ["AMT_REQ_CREDIT_BUREAU_HOUR", "AMT_REQ_CREDIT_BUREAU_DAY", "AMT_REQ_CREDIT_BUREAU_WEEK",
+             "AMT_REQ_CREDIT_BUREAU_MON", "AMT_REQ_CREDIT_BUREAU_QRT", "AMT_REQ_CREDIT_BUREAU_YEAR"]
+
+
+def _choice(rng: np.random.Generator, values: list, size: int, shares: list = None) -> np.ndarray:
+    shares = None if shares is None else np.asarray(shares) / np.sum(shares)
+
+    return rng.choice(np.asarray(values, dtype=object), size=size, p=shares)
+
+
+def _with_nans(rng: np.random.Generator, values: np.ndarray, nan_rate: float) -> np.ndarray:
+    values = values.astype(float)
+    values[rng.random(len(values)) < nan_rate] = np.nan
+
+    return values
+
+
+def _children(rng: np.random.Generator, parent_ids: np.ndarray, mean_count: float, coverage: float) -> tuple:
+    """Returns parent id of every child row and position of the row among rows of its parent.
+    Share coverage of parents has children, on average mean_count per parent over all parents.
+    """
+
+    counts = rng.poisson(mean_count / coverage, len(parent_ids)) * (rng.random(len(parent_ids)) < coverage)
+    ids = np.repeat(parent_ids, counts)
+    positions = np.arange(len(ids)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    return ids, positions
+
+
+def _application(rng: np.random.Generator, client_ids: np.ndarray, train: bool) -> pd.DataFrame:
+    n = len(client_ids)
+    income = np.round(rng.lognormal(11.9, 0.5, n), -2)
+    credit = np.round(rng.lognormal(13.1, 0.6, n), -2)
+    goods_price = _with_nans(rng, np.round(credit * rng.uniform(0.8, 1.0, n), -2), 0.001)
+    own_car = _choice(rng, ["N", "Y"], n, [0.66, 0.34])
+
+    application = {"SK_ID_CURR": client_ids}
+
+    if train:
+        application["TARGET"] = (rng.random(n) < 0.0807).astype(np.int64)
+
+    application.update({
+        "NAME_CONTRACT_TYPE": _choice(rng, ["Cash loans", "Revolving loans"], n, [0.905, 0.095]),
+        "CODE_GENDER": _choice(rng, ["F", "M", "XNA"], n, [0.658, 0.342, 0.00001]),
+        "FLAG_OWN_CAR": own_car,
+        "FLAG_OWN_REALTY": _choice(rng, ["Y", "N"], n, [0.69, 0.31]),
+        "CNT_CHILDREN": rng.poisson(0.42, n),
+        "AMT_INCOME_TOTAL": income,
+        "AMT_CREDIT": credit,
+        "AMT_ANNUITY": _with_nans(rng, np.round(credit / rng.uniform(10, 40, n), 1), 0.00004),
+        "AMT_GOODS_PRICE": goods_price,
+        "NAME_INCOME_TYPE": _choice(rng, ["Working", "Commercial associate", "Pensioner", "State servant"], n, [0.52, 0.23, 0.18, 0.07]),
+        "NAME_EDUCATION_TYPE": _choice(rng, ["Secondary / secondary special", "Higher education", "Incomplete higher", "Lower secondary"],
+                                       n, [0.71, 0.24, 0.035, 0.015]),
+        "DAYS_BIRTH": -rng.integers(7_489, 25_229, n),
+        "DAYS_EMPLOYED": np.where(rng.random(n) < 0.18, 365_243, -rng.integers(0, 17_912, n)),
+        "OWN_CAR_AGE": np.where(own_car == "Y", _with_nans(rng, rng.integers(0, 65, n), 0.0), np.nan),
+        "ORGANIZATION_TYPE": _choice(rng, ORGANIZATION_TYPES, n),
+        "REGION_RATING_CLIENT": _choice(rng, [1, 2, 3], n, [0.1, 0.74, 0.16]).astype(np.int64),
+        "REGION_RATING_CLIENT_W_CITY": _choice(rng, [1, 2, 3], n, [0.11, 0.75, 0.14]).astype(np.int64),
+        "EXT_SOURCE_1": _with_nans(rng, rng.beta(3, 3, n), 0.56),
+        "EXT_SOURCE_2": _with_nans(rng, rng.beta(4, 2.5, n), 0.002),
+        "EXT_SOURCE_3": _with_nans(rng, rng.beta(3.5, 2.5, n), 0.2),
+    })
+
+    for column, mean in (("OBS_30_CNT_SOCIAL_CIRCLE", 1.4), ("DEF_30_CNT_SOCIAL_CIRCLE", 0.14),
+                         ("OBS_60_CNT_SOCIAL_CIRCLE", 1.4), ("DEF_60_CNT_SOCIAL_CIRCLE", 0.1)):
+        application[column] = _with_nans(rng, rng.poisson(mean, n), 0.0033)
+
+    for column, mean in zip(ENQUIRIES, (0.006, 0.007, 0.034, 0.27, 0.27, 1.9)):
+        application[column] = _with_nans(rng, rng.poisson(mean, n), 0.135)
+
+    for document in range(2, 22):
+        application[f"FLAG_DOCUMENT_{document}"] = (rng.random(n) < (0.71 if document == 3 else 0.01)).astype(np.int64)
+
+    return pd.DataFrame(application)
+
+
+def _bureau(rng: np.random.Generator, client_ids: np.ndarray) -> pd.DataFrame:
+    ids, _ = _children(rng, client_ids, 4.8, 0.86)
+    n = len(ids)
+    active = _choice(rng, ["Closed", "Active", "Sold", "Bad debt"], n, [0.63, 0.367, 0.0039, 0.00001])
+
+    return pd.DataFrame({
+        "SK_ID_CURR": ids,
+        "SK_ID_BUREAU": 5_000_000 + np.arange(n),
+        "CREDIT_ACTIVE": active,
+        "CREDIT_CURRENCY": _choice(rng, ["currency 1", "currency 2"], n, [0.999, 0.001]),
+        "DAYS_CREDIT": -rng.integers(0, 2_923, n),
+        "CREDIT_DAY_OVERDUE": np.where(rng.random(n) < 0.0025, rng.integers(1, 2_800, n), 0),
+        "DAYS_CREDIT_ENDDATE": _with_nans(rng, rng.integers(-42_000, 31_000, n) // 10, 0.06),
+        "AMT_CREDIT_SUM": _with_nans(rng, np.round(rng.lognormal(11.6, 1.2, n), 2), 0.0),
+        "AMT_CREDIT_SUM_DEBT": _with_nans(rng, np.where(active == "Active", np.round(rng.lognormal(11, 1.5, n), 2), 0.0), 0.15),
+        "CREDIT_TYPE": _choice(rng, CREDIT_TYPES, n, CREDIT_TYPE_SHARES),
+        "AMT_ANNUITY": _with_nans(rng, np.round(rng.lognormal(9, 1.5, n), 2), 0.71),
+    })
+
+
+def _bureau_balance(rng: np.random.Generator, bureau_ids: np.ndarray) -> pd.DataFrame:
+    ids, months = _children(rng, bureau_ids, 15.9, 0.48)
+
+    return pd.DataFrame({
+        "SK_ID_BUREAU": ids,
+        "MONTHS_BALANCE": -months,
+        "STATUS": _choice(rng, ["C", "0", "X", "1", "5", "2", "3", "4"], len(ids), [0.5, 0.27, 0.21, 0.009, 0.0023, 0.0009, 0.0003, 0.0002]),
+    })
+
+
+def _previous_application(rng: np.random.Generator, client_ids: np.ndarray) -> pd.DataFrame:
+    ids, _ = _children(rng, client_ids, 4.7, 0.95)
+    n = len(ids)
+    application = np.round(rng.lognormal(11.4, 1.3, n), 1)
+    down_payment_rate = rng.beta(1, 10, n)
+
+    return pd.DataFrame({
+        "SK_ID_PREV": 1_000_000 + np.arange(n),
+        "SK_ID_CURR": ids,
+        "NAME_CONTRACT_TYPE": _choice(rng, ["Cash loans", "Consumer loans", "Revolving loans", "XNA"], n, [0.447, 0.437, 0.116, 0.0002]),
+        "AMT_ANNUITY": _with_nans(rng, np.round(application / rng.uniform(6, 36, n), 1), 0.22),
+        "AMT_APPLICATION": application,
+        "AMT_CREDIT": np.round(application * rng.uniform(0.9, 1.2, n), 1),
+        "AMT_DOWN_PAYMENT": _with_nans(rng, np.round(application * down_payment_rate, 1), 0.54),
+        "AMT_GOODS_PRICE": _with_nans(rng, application, 0.23),
+        "RATE_DOWN_PAYMENT": _with_nans(rng, down_payment_rate, 0.54),
+        "NAME_CONTRACT_STATUS": _choice(rng, ["Approved", "Canceled", "Refused", "Unused offer"], n, [0.62, 0.19, 0.17, 0.02]),
+        "DAYS_DECISION": -rng.integers(1, 2_923, n),
+        "CNT_PAYMENT": _with_nans(rng, _choice(rng, [6, 12, 18, 24, 36, 48, 60], n).astype(float), 0.22),
+        "NFLAG_INSURED_ON_APPROVAL": _with_nans(rng, (rng.random(n) < 0.33), 0.4),
+    })
+
+
+def _monthly_rows(rng: np.random.Generator, previous_application: pd.DataFrame, mean_count: float, coverage: float) -> tuple:
+    """Returns SK_ID_PREV, SK_ID_CURR and MONTHS_BALANCE of monthly rows of previous credits."""
+
+    prev_ids, months = _children(rng, previous_application["SK_ID_PREV"].to_numpy(), mean_count, coverage)
+    client_ids = previous_application.set_index("SK_ID_PREV")["SK_ID_CURR"].reindex(prev_ids).to_numpy()
+
+    return prev_ids, client_ids, -(months + 1)
+
+
+def _pos_cash_balance(rng: np.random.Generator, previous_application: pd.DataFrame) -> pd.DataFrame:
+    prev_ids, client_ids, months = _monthly_rows(rng, previous_application, 6.0, 0.56)
+    n = len(prev_ids)
+
+    return pd.DataFrame({
+        "SK_ID_PREV": prev_ids,
+        "SK_ID_CURR": client_ids,
+        "MONTHS_BALANCE": months,
+        "CNT_INSTALMENT": _with_nans(rng, _choice(rng, [6, 12, 24, 36, 48], n).astype(float), 0.0026),
+        "CNT_INSTALMENT_FUTURE": _with_nans(rng, rng.integers(0, 48, n), 0.0026),
+        "NAME_CONTRACT_STATUS": _choice(rng, ["Active", "Completed", "Signed", "Demand", "Returned to the store"], n,
+                                        [0.915, 0.074, 0.009, 0.0007, 0.0005]),
+        "SK_DPD": np.where(rng.random(n) < 0.03, rng.integers(1, 4_000, n), 0),
+        "SK_DPD_DEF": np.where(rng.random(n) < 0.02, rng.integers(1, 100, n), 0),
+    })
+
+
+def _credit_card_balance(rng: np.random.Generator, previous_application: pd.DataFrame) -> pd.DataFrame:
+    prev_ids, client_ids, months = _monthly_rows(rng, previous_application, 2.3, 0.062)
+    n = len(prev_ids)
+    drawings_nan = rng.random(n) < 0.195
+
+    def drawings(mean: float) -> np.ndarray:
+        values = np.where(rng.random(n) < 0.2, np.round(rng.lognormal(mean, 1.5, n), 2), 0.0)
+        return np.where(drawings_nan, np.nan, values)
+
+    return pd.DataFrame({
+        "SK_ID_PREV": prev_ids,
+        "SK_ID_CURR": client_ids,
+        "MONTHS_BALANCE": months,
+        "AMT_BALANCE": np.round(np.where(rng.random(n) < 0.5, rng.lognormal(11, 1.2, n), 0.0), 2),
+        "AMT_CREDIT_LIMIT_ACTUAL": _choice(rng, [45_000, 90_000, 135_000, 180_000, 225_000, 270_000], n).astype(np.int64),
+        "AMT_DRAWINGS_ATM_CURRENT": drawings(9.5),
+        "AMT_DRAWINGS_CURRENT": np.round(np.where(rng.random(n) < 0.25, rng.lognormal(9.5, 1.5, n), 0.0), 2),
+        "AMT_DRAWINGS_OTHER_CURRENT": drawings(9),
+        "AMT_DRAWINGS_POS_CURRENT": drawings(8.5),
+        "NAME_CONTRACT_STATUS": _choice(rng, ["Active", "Completed", "Signed", "Demand"], n, [0.963, 0.033, 0.0031, 0.0009]),
+        "SK_DPD": np.where(rng.random(n) < 0.04, rng.integers(1, 3_000, n), 0),
+        "SK_DPD_DEF": np.where(rng.random(n) < 0.02, rng.integers(1, 100, n), 0),
+    })
+
+
+def _installments_payments(rng: np.random.Generator, previous_application: pd.DataFrame) -> pd.DataFrame:
+    prev_ids, client_ids, months = _monthly_rows(rng, previous_application, 8.1, 0.6)
+    n = len(prev_ids)
+    instalment = np.round(rng.lognormal(9.3, 1.2, n), 3)
+    days_instalment = (months * 30 + rng.integers(-15, 15, n)).astype(float)
+
+    return pd.DataFrame({
+        "SK_ID_PREV": prev_ids,
+        "SK_ID_CURR": client_ids,
+        "NUM_INSTALMENT_VERSION": _choice(rng, [1, 0, 2, 3, 4], n, [0.64, 0.3, 0.045, 0.01, 0.005]).astype(float),
+        "NUM_INSTALMENT_NUMBER": -months,
+        "DAYS_INSTALMENT": days_instalment,
+        "DAYS_ENTRY_PAYMENT": _with_nans(rng, days_instalment - rng.poisson(8, n), 0.0002),
+        "AMT_INSTALMENT": instalment,
+        "AMT_PAYMENT": _with_nans(rng, np.where(rng.random(n) < 0.9, instalment, np.round(instalment * rng.random(n), 3)), 0.0002),
+    })
+
+
+def generate_tables(scale: float = 0.01, random_state: int = 0) -> dict:
+    """Returns dictionary with synthetic versions of all eight Home Credit tables. Tables have the columns used
+    by custom_transformers.py and the notebook, the same key relationships (SK_ID_CURR -> SK_ID_BUREAU -> monthly rows,
+    SK_ID_CURR -> SK_ID_PREV -> monthly rows) and roughly the same cardinalities, NaN rates and rows per client as Kaggle data.
+
+    Keyword arguments:
+    scale -- size of the tables relative to Kaggle data, for example 0.01 gives about 3075 training applicants.
+    random_state -- seed of numpy random generator, the same seed and scale give the same tables.
+    """
+
+    rng = np.random.default_rng(random_state)
+    n_train = max(int(KAGGLE_ROWS["application_train"] * scale), 1)
+    n_test = max(int(KAGGLE_ROWS["application_test"] * scale), 1)
+    client_ids = 100_002 + rng.permutation(n_train + n_test)
+
+    tables = {"application_train": _application(rng, np.sort(client_ids[:n_train]), train=True),
+              "application_test": _application(rng, np.sort(client_ids[n_train:]), train=False)}
+
+    tables["bureau"] = _bureau(rng, client_ids)
+    tables["bureau_balance"] = _bureau_balance(rng, tables["bureau"]["SK_ID_BUREAU"].to_numpy())
+    tables["previous_application"] = _previous_application(rng, client_ids)
+    tables["pos_cash_balance"] = _pos_cash_balance(rng, tables["previous_application"])
+    tables["credit_card_balance"] = _credit_card_balance(rng, tables["previous_application"])
+    tables["installments_payments"] = _installments_payments(rng, tables["previous_application"])
+
+    return {table: tables[table] for table in TABLES}
+
+
+def write_tables(data_dir: str, scale: float = 0.01, random_state: int = 0):
+    """Writes synthetic tables as CSV files "{data_dir}/{table}.csv", the same layout as Kaggle data expected by data_loader.py."""
+
+    os.makedirs(data_dir, exist_ok=True)
+
+    for table, dataframe in generate_tables(scale, random_state).items():
+        dataframe.to_csv(os.path.join(data_dir, f"{table}.csv"), index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Home Credit tables.")
+    parser.add_argument("data_dir", help="directory for CSV files")
+    parser.add_argument("--scale", type=float, default=0.01, help="size of tables relative to Kaggle data")
+    parser.add_argument("--seed", type=int, default=0, help="seed of random generator")
+    args = parser.parse_args()
+
+    write_tables(args.data_dir, args.scale, args.seed)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
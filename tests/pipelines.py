@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer, make_column_selector
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
+
+from custom_transformers import drop_id, region_rating
+
+
+def applications(n_rows: int = 40, seed: int = 0) -> tuple:
+    """Returns small application table and its TARGET."""
+
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({"SK_ID_CURR": np.arange(100_000, 100_000 + n_rows),
+                      "NAME_CONTRACT_TYPE": rng.choice(["Cash loans", "Revolving loans"], n_rows),
+                      "REGION_RATING_CLIENT": rng.integers(1, 4, n_rows),
+                      "REGION_RATING_CLIENT_W_CITY": rng.integers(1, 4, n_rows),
+                      "AMT_INCOME_TOTAL": rng.normal(150_000, 50_000, n_rows)})
+    y = pd.Series(rng.integers(0, 2, n_rows), name="TARGET")
+
+    return X, y
+
+
+def _preprocessor() -> ColumnTransformer:
+    return ColumnTransformer(
+        transformers=[
+            ("cat_transformer", OneHotEncoder(handle_unknown="ignore"), make_column_selector(dtype_include=object))
+        ],
+        remainder="passthrough"
+    )
+
+
+def shared_step_pipelines(X: pd.DataFrame, y: pd.Series) -> tuple:
+    """Returns two fitted pipelines which share one FunctionTransformer, as get_drop_id is shared by pipes of the notebook.
+    The second pipeline is fitted last, so the shared step keeps feature_names_in_ of its input.
+    """
+
+    get_drop_id = FunctionTransformer(drop_id)
+    first = Pipeline(steps=[("drop_id", get_drop_id), ("preprocessor", _preprocessor()), ("model", LogisticRegression())])
+    second = Pipeline(steps=[("region_rating", FunctionTransformer(region_rating)), ("drop_id", get_drop_id),
+                             ("preprocessor", _preprocessor()), ("model", LogisticRegression())])
+
+    first.fit(X, y)
+    second.fit(X, y)
+
+    return first, second
\ No newline at end of file
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from batch_scoring import BatchScorer, Blend
+from pipelines import applications, shared_step_pipelines
+
+
+def test_pipelines_with_shared_step_and_blends(tmp_path):
+    X, y = applications()
+    first, second = shared_step_pipelines(X, y)
+    scorer = BatchScorer({"first": first, "second": second},
+                         blends=[Blend("averaged", ("first", "second")), Blend("ranked", ("first", "second"), method="rank")],
+                         chunksize=16, output_format="csv")
+
+    summary = scorer.score(X, output_dir=str(tmp_path))
+
+    assert (summary["Rows"] == len(X)).all()
+
+    expected = {"first": first.predict_proba(X)[:, 1], "second": second.predict_proba(X)[:, 1]}
+    expected["averaged"] = (expected["first"] + expected["second"]) / 2
+    expected["ranked"] = (pd.Series(expected["first"]).rank(pct=True) + pd.Series(expected["second"]).rank(pct=True)).to_numpy() / 2
+
+    for name, predictions in expected.items():
+        written = pd.read_csv(tmp_path / f"{name}_predictions.csv")
+        np.testing.assert_array_equal(written["SK_ID_CURR"], X["SK_ID_CURR"])
+        np.testing.assert_allclose(written["TARGET"], predictions)
\ No newline at end of file
@@ -0,0 +1,19 @@
+import numpy as np
+from sklearn.preprocessing import FunctionTransformer
+
+from custom_transformers import region_rating
+from feature_graph import FeatureGraph, FeatureStep
+from pipelines import applications
+
+
+def test_fit_keeps_shared_transformer_unchanged():
+    X, y = applications()
+    get_region_rating = FunctionTransformer(region_rating)
+    get_region_rating.fit(X)
+
+    rating_columns = ("REGION_RATING_CLIENT", "REGION_RATING_CLIENT_W_CITY")
+    graph = FeatureGraph([FeatureStep("region_rating", get_region_rating, rating_columns, ("REGION_RATING",), rating_columns)], n_jobs=1)
+    result = graph.fit_transform(X, y)
+
+    np.testing.assert_array_equal(get_region_rating.feature_names_in_, X.columns)
+    np.testing.assert_array_equal(result["REGION_RATING"], X["REGION_RATING_CLIENT"] * X["REGION_RATING_CLIENT_W_CITY"])
\ No newline at end of file
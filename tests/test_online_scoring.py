@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from online_scoring import OnlineScorer
+from pipelines import applications, shared_step_pipelines
+
+
+def test_pipelines_with_shared_step_score_as_predict_proba():
+    X, y = applications()
+    first, second = shared_step_pipelines(X, y)
+
+    for pipeline in (first, second):
+        np.testing.assert_allclose(OnlineScorer(pipeline).predict_proba(X), pipeline.predict_proba(X)[:, 1])
+
+
+def test_single_applicant_from_dictionary():
+    X, y = applications()
+    first, _ = shared_step_pipelines(X, y)
+    applicant = X.iloc[0].to_dict()
+
+    assert OnlineScorer(first, dtypes=X.dtypes).score(applicant) == pytest.approx(first.predict_proba(X.iloc[[0]])[0, 1])
+
+
+def test_missing_column_is_named():
+    X, y = applications()
+    first, _ = shared_step_pipelines(X, y)
+
+    with pytest.raises(ValueError, match="AMT_INCOME_TOTAL"):
+        OnlineScorer(first).predict_proba(X.drop(columns=["AMT_INCOME_TOTAL"]))
\ No newline at end of file
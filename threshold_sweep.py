@@ -0,0 +1,97 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+
+from functions import fit_transform_steps, transform_steps
+
+
+def feature_importances(estimator) -> np.ndarray:
+    """Takes in fitted estimator and returns importances of its features the same way as SelectFromModel:
+    absolute coefficients (L1 norm over classes) or feature_importances_.
+    """
+
+    if hasattr(estimator, "coef_"):
+        coef = np.asarray(estimator.coef_)
+        return np.abs(coef) if coef.ndim == 1 else np.linalg.norm(coef, ord=1, axis=0)
+
+    if hasattr(estimator, "feature_importances_"):
+        return np.asarray(estimator.feature_importances_)
+
+    raise ValueError(f"{type(estimator).__name__} has neither coef_ nor feature_importances_.")
+
+
+def selection_masks(importances: np.ndarray, thresholds: list = None, max_features: list = None) -> list:
+    """Takes in feature importances and returns list of (parameter, value, mask) with boolean mask of selected features
+    for every threshold (importance >= threshold) and every max_features value (that many most important features).
+    """
+
+    masks = [("threshold", threshold, importances >= threshold) for threshold in thresholds or []]
+
+    # Stable sort keeps the same order of features with equal importance as SelectFromModel.
+    order = np.argsort(-importances, kind="mergesort")
+
+    for n_features in max_features or []:
+        mask = np.zeros(len(importances), dtype=bool)
+        mask[order[:n_features]] = True
+        masks.append(("max_features", n_features, mask))
+
+    return masks
+
+
+def _fit_subset(model, X_train, y_train, X_test, columns: np.ndarray, id: pd.Series, output_path: str) -> float:
+    """Fits model on selected columns, writes predictions of the test set and returns fit time in seconds. Runs in a joblib worker."""
+
+    start = time.perf_counter()
+    model = clone(model).fit(X_train[:, columns], y_train)
+    predictions = model.predict_proba(X_test[:, columns])[:, 1]
+
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        pd.DataFrame({"SK_ID_CURR": id, "TARGET": predictions}).to_csv(output_path, index=False)
+
+    return time.perf_counter() - start
+
+
+def threshold_sweep(preprocessing: list, selector_estimator, model, X_train: pd.DataFrame, y_train: pd.Series,
+                    X_test: pd.DataFrame, id: pd.Series, thresholds: list = None, max_features: list = None,
+                    output_path: str = None, n_jobs: int = None) -> pd.DataFrame:
+    """Takes in steps of a pipeline before SelectFromModel, estimator of the selector and final model and returns table
+    with number of selected features and fit time for every threshold or max_features value. Preprocessing steps and
+    selector estimator are fitted only once, then only the final model is fitted on selected columns, in parallel.
+    Predictions of every value are written as soon as its model is fitted.
+
+    Keyword arguments:
+    preprocessing -- list of (name, transformer) steps before the selector, for example log_pipe.steps[:-1] of log_pipe without selector step.
+    selector_estimator -- estimator of SelectFromModel, for example log_reg.
+    model -- final model, for example log_reg.
+    X_train, y_train -- training features and target.
+    X_test -- test features.
+    id -- SK_ID_CURR of the test set.
+    thresholds -- list of SelectFromModel thresholds.
+    max_features -- list of SelectFromModel max_features values.
+    output_path -- path of CSV file with predictions with {parameter} and {value} placeholders,
+                   for example "submissions/temp/log_{value}_mean.csv". Predictions are not written if None.
+    n_jobs -- number of parallel fits, all CPUs if None.
+    """
+
+    X_train, y_train = fit_transform_steps(preprocessing, X_train, y_train)
+    X_test = transform_steps(preprocessing, X_test)
+
+    importances = feature_importances(clone(selector_estimator).fit(X_train, y_train))
+    masks = selection_masks(importances, thresholds, max_features)
+
+    paths = [output_path.format(parameter=parameter, value=value) if output_path else None for parameter, value, _ in masks]
+
+    fit_times = Parallel(n_jobs=n_jobs or -1)(
+        delayed(_fit_subset)(model, X_train, y_train, X_test, np.flatnonzero(mask), id, path)
+        for (_, _, mask), path in zip(masks, paths))
+
+    return pd.DataFrame({"Parameter": [parameter for parameter, _, _ in masks],
+                         "Value": [value for _, value, _ in masks],
+                         "Selected features": [int(mask.sum()) for _, _, mask in masks],
+                         "Fit time, s": fit_times,
+                         "Output": paths})
\ No newline at end of file